@@ -1,8 +1,24 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import io
-from typing import List, Dict, Tuple
+import os
+import glob
+import csv
+import zipfile
+import json
+import hashlib
+import sqlite3
+import tempfile
+from typing import List, Dict, Tuple, Optional, NamedTuple
 import re
+import time
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+import pyarrow as pa
+import pyarrow.parquet as pq
+import metrics
+from parse_cache import ParseCache, FIELDS as PARSE_FIELDS
 
 # Page configuration
 st.set_page_config(
@@ -35,6 +51,254 @@ COLUMN_ORDER = [
 FLIGHT1_COLUMNS = ["1 Flight", "1 Alpha", "1 Bravo", "1 Charlie", "1 Delta"]
 FLIGHT2_COLUMNS = ["2 Flight", "2 Alpha", "2 Bravo", "2 Charlie", "2 Delta"]
 
+# Section column -> group used for the rank x flight breakdown
+SECTION_GROUPS = {
+    "Staff": "Staff",
+    "Executive and Seniors": "Executive and Seniors",
+    **{col: "Flight 1" for col in FLIGHT1_COLUMNS},
+    **{col: "Flight 2" for col in FLIGHT2_COLUMNS},
+    "Not Listed": "Not Listed"
+}
+
+# Operational metrics (get-or-create, so declaring them on every rerun is safe)
+FILE_READ_SECONDS = metrics.histogram('aafc_file_read_seconds', "Time to read an uploaded roll file")
+PROCESS_SECONDS = metrics.histogram('aafc_process_seconds', "Time spent in process_rolls_data")
+ROWS_PROCESSED = metrics.counter('aafc_rows_processed_total', "Form submissions (rows) processed")
+NAMES_PROCESSED = metrics.counter('aafc_names_processed_total', "Unique names in processed rolls")
+UNKNOWN_RANK_NAMES = metrics.counter('aafc_unknown_rank_names_total', "Processed names with UNKNOWN rank")
+UPLOADS = metrics.counter('aafc_uploads_total', "Roll files processed (once per rerun with a file) by outcome")
+PARSE_CACHE_LOOKUPS = metrics.counter('aafc_parse_cache_lookups_total', "Parse cache lookups by result")
+
+# Metrics export; set AAFC_METRICS_PORT to serve /metrics locally and/or
+# AAFC_METRICS_FILE to write them for node_exporter's textfile collector
+METRICS_PORT = os.environ.get('AAFC_METRICS_PORT', '')
+METRICS_FILE = os.environ.get('AAFC_METRICS_FILE', '')
+
+# Rank aliases: variant spelling -> canonical rank.
+# Matching is case-insensitive, except for the spellings in CAPITALS_ONLY_RANKS.
+# Spaces in an alias also match dots, hyphens or nothing at all, so "FLT LT"
+# covers "Flt Lt", "Flt-Lt" and "FltLt".
+# Every canonical rank is implicitly an alias of itself.
+RANK_ALIASES = {
+    "SQN LDR": "SQNLDR",
+    "FLT LT": "FLTLT",
+    "FLG OFF": "FLGOFF",
+    "FG OFF": "FLGOFF",
+    "PLT OFF": "PLTOFF",
+    "W OFF": "WOFF",
+    "WO": "WOFF",
+    "F SGT": "FSGT",
+    "FLT SGT": "FSGT",
+    "CIVILIAN": "CIV",
+    "OOC": "CIV",
+    "C UO": "CUO",
+    "CDT UO": "CUO",
+    "C WOFF": "CWOFF",
+    "CWO": "CWOFF",
+    "CDT WOFF": "CWOFF",
+    "C FSGT": "CFSGT",
+    "CDT FSGT": "CFSGT",
+    "C SGT": "CSGT",
+    "CDT SGT": "CSGT",
+    "C CPL": "CCPL",
+    "CDT CPL": "CCPL",
+    "L CDT": "LCDT",
+    "LDG CDT": "LCDT",
+    "CADET": "CDT",
+}
+
+# Separators allowed inside a multi-word alias and between the rank and the name
+_RANK_SEPARATOR = r'[\s.\-]'
+
+# Spellings that are also common names only match in capitals, since
+# "Wo Chen" or "Lac Tran" is more likely an unranked name than a rank
+CAPITALS_ONLY_RANKS = ["WO", "AC", "LAC", "CIV"]
+
+def _rank_key(text: str) -> str:
+    """Normalise a rank spelling to its lookup key (uppercase, no separators)."""
+    return re.sub(r'[\s.\-]+', '', text.upper())
+
+def _trie_regex(words: List[str]) -> str:
+    """
+    Build a regex alternation structured as a trie over the given words, so the
+    matching cost depends on the length of the rank rather than on how many
+    aliases exist. A space inside a word matches any run of separators.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def _emit(node: dict) -> str:
+        terminal = '' in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = _RANK_SEPARATOR + '*' if char == ' ' else re.escape(char)
+            branches.append(atom + _emit(node[char]))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            if len(branches) == 1:
+                body = '(?:' + body + ')'
+            return body + '?'
+        return body
+
+    return _emit(trie)
+
+def build_rank_table(aliases: Dict[str, str]) -> Tuple[Dict[str, str], re.Pattern]:
+    """
+    Compile a rank alias table into a lookup dict (normalised key -> canonical
+    rank) and a single pattern that splits a name string into 'rank' and
+    'remainder' groups. Spellings in CAPITALS_ONLY_RANKS match in capitals
+    only; all others match in any case. Raises ValueError for
+    aliases that point to an unrecognised rank or collide with a different rank.
+    """
+    valid_ranks = STAFF_RANKS + CADET_RANKS[:-1]  # Exclude UNKNOWN
+    lookup = {rank: rank for rank in valid_ranks}
+    for alias, rank in aliases.items():
+        if rank not in valid_ranks:
+            raise ValueError(f"Rank alias '{alias}' maps to unrecognised rank '{rank}'")
+        key = _rank_key(alias)
+        if lookup.get(key, rank) != rank:
+            raise ValueError(f"Rank alias '{alias}' conflicts with rank '{lookup[key]}'")
+        lookup[key] = rank
+
+    spellings = set(valid_ranks)
+    for alias in aliases:
+        spellings.add(' '.join(re.split(r'[\s.\-]+', alias.strip().upper())))
+
+    capitals_only = {_rank_key(spelling) for spelling in CAPITALS_ONLY_RANKS}
+    any_case_spellings = sorted(spelling for spelling in spellings if _rank_key(spelling) not in capitals_only)
+    capitals_spellings = sorted(spelling for spelling in spellings if _rank_key(spelling) in capitals_only)
+    
+    # Rank, optional (AAFC) suffix, then at least one separator before the name.
+    # Within each branch the trie prefers the longest spelling, so e.g.
+    # "CDT UO" isn't cut short at "CDT".
+    pattern = re.compile(
+        r'^(?P<rank>(?i:' + _trie_regex(any_case_spellings) + r')|' + _trie_regex(capitals_spellings) + r')'
+        r'(?i:\s*\(AAFC\))?' + _RANK_SEPARATOR + r'+(?P<remainder>.+)$'
+    )
+    return lookup, pattern
+
+# Bump when parse_name/parse_names change how a name is split, so parses
+# cached on disk by an older version are discarded
+PARSER_VERSION = 2
+
+def rank_table_signature() -> str:
+    """Short hash of the rank tables and parser version; cached parses are only valid for the same ones."""
+    payload = json.dumps([PARSER_VERSION, STAFF_RANKS, CADET_RANKS, sorted(RANK_ALIASES.items()),
+                          CAPITALS_ONLY_RANKS])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+class SharedResources(NamedTuple):
+    """
+    Immutable lookups shared by every session in the process.
+    Treat the contents as read-only: the same objects are handed to all sessions.
+    """
+    signature: str
+    rank_lookup: Dict[str, str]
+    rank_pattern: re.Pattern
+    staff_priority: Dict[str, int]
+    cadet_priority: Dict[str, int]
+    rank_order: List[str]
+    section_groups: Dict[str, str]
+    flight_order: Dict[str, int]
+
+@st.cache_resource(show_spinner=False)
+def _build_shared_resources(signature: str) -> SharedResources:
+    """
+    Build the shared resources for the current tables. Streamlit runs this at
+    most once per signature across all sessions and threads.
+    """
+    lookup, pattern = build_rank_table(RANK_ALIASES)
+    return SharedResources(
+        signature=signature,
+        rank_lookup=lookup,
+        rank_pattern=pattern,
+        staff_priority={rank: idx for idx, rank in enumerate(STAFF_RANKS)},
+        cadet_priority={rank: idx for idx, rank in enumerate(CADET_RANKS)},
+        rank_order=STAFF_RANKS + CADET_RANKS,
+        section_groups=dict(SECTION_GROUPS),
+        flight_order={flight: idx for idx, flight in enumerate(dict.fromkeys(SECTION_GROUPS.values()))}
+    )
+
+def get_shared_resources() -> SharedResources:
+    """Return the process-wide resources for the current rank tables."""
+    return _build_shared_resources(rank_table_signature())
+
+# Streamlit re-executes this file on every rerun; this is a cache hit after the first
+RESOURCES = get_shared_resources()
+RANK_LOOKUP, RANK_PATTERN = RESOURCES.rank_lookup, RESOURCES.rank_pattern
+
+def _bind_shared_resources() -> None:
+    """Point the module-level lookups at the resources for the current tables."""
+    global RESOURCES, RANK_LOOKUP, RANK_PATTERN
+    RESOURCES = get_shared_resources()
+    RANK_LOOKUP, RANK_PATTERN = RESOURCES.rank_lookup, RESOURCES.rank_pattern
+
+def set_rank_aliases(aliases: Dict[str, str]) -> None:
+    """Replace the rank alias table and recompile the rank pattern."""
+    global RANK_ALIASES
+    build_rank_table(aliases)  # Validate before replacing anything
+    RANK_ALIASES = dict(aliases)
+    _bind_shared_resources()
+
+def clear_shared_resources() -> None:
+    """Drop every process-wide cached resource so it is rebuilt on next use."""
+    _build_shared_resources.clear()
+    _open_parse_cache.clear()
+    load_nominal_roll.clear()
+    _bind_shared_resources()
+
+# Shared on-disk cache of parsed names; set AAFC_PARSE_CACHE to '' to disable.
+# It must be on a local disk: SQLite's WAL mode doesn't work on network shares
+# such as App Service's /home, so the default is the local temp directory.
+PARSE_CACHE_PATH = os.environ.get(
+    'AAFC_PARSE_CACHE',
+    os.path.join(tempfile.gettempdir(), 'aafc-rolls', 'parse_cache.sqlite')
+)
+
+@st.cache_resource(show_spinner=False)
+def _open_parse_cache(path: str) -> Optional[ParseCache]:
+    """
+    Open the shared parse cache once per path across all sessions.
+    Returns None if the cache is disabled or can't be opened.
+    """
+    if not path:
+        return None
+    try:
+        return ParseCache(path)
+    except (sqlite3.Error, OSError):
+        return None
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Return the shared parse cache, or None. Lookups use the current rank_table_signature()."""
+    return _open_parse_cache(PARSE_CACHE_PATH)
+
+@st.cache_resource
+def start_metrics_exporters() -> None:
+    """Start the configured metrics exporters once per process."""
+    if METRICS_PORT:
+        try:
+            metrics.start_http_server(int(METRICS_PORT))
+        except OSError:
+            pass  # Port taken, e.g. by another worker process
+    if METRICS_FILE:
+        metrics.start_textfile_writer(METRICS_FILE)
+
+def _match_rank(name_str: str) -> Tuple[str, str]:
+    """Return (canonical_rank, remainder), or (None, None) if there is no known rank."""
+    rank_match = RANK_PATTERN.match(name_str)
+    if not rank_match:
+        return None, None
+    rank = RANK_LOOKUP.get(_rank_key(rank_match.group('rank')))
+    if rank is None:
+        return None, None
+    return rank, rank_match.group('remainder')
+
 def parse_name(name_str: str) -> Dict[str, str]:
     """
     Parse a name string in format 'RANK Surname (Firstname)' or 'RANK Surname'.
@@ -43,11 +307,12 @@ def parse_name(name_str: str) -> Dict[str, str]:
     """
     name_str = name_str.strip()
     
-    # Extract rank (all caps at the beginning), handling optional (AAFC) suffix
-    rank_match = re.match(r'^([A-Z]+)(?:\(AAFC\))?\s+(.+)$', name_str)
+    # Extract rank (any known spelling at the beginning), handling optional (AAFC) suffix
+    rank, remainder = _match_rank(name_str)
     
-    if not rank_match:
-        # No rank found - treat entire string as surname with UNKNOWN rank
+    if rank is None:
+        # No recognised rank - treat entire string as surname with UNKNOWN rank
+        # (a leading word that isn't a rank is probably part of the surname)
         # Check if there's a firstname in brackets
         if '(' in name_str and ')' in name_str:
             parts = name_str.split('(')
@@ -64,27 +329,6 @@ def parse_name(name_str: str) -> Dict[str, str]:
             'original': f"UNKNOWN {name_str}"
         }
     
-    rank = rank_match.group(1)
-    remainder = rank_match.group(2)
-    
-    # Check if the rank is actually a valid rank, otherwise treat as surname
-    if rank not in STAFF_RANKS and rank not in CADET_RANKS[:-1]:  # Exclude UNKNOWN from check
-        # The "rank" is probably part of the surname
-        if '(' in name_str and ')' in name_str:
-            parts = name_str.split('(')
-            surname = parts[0].strip()
-            firstname = parts[1].replace(')', '').strip()
-        else:
-            surname = name_str
-            firstname = None
-        
-        return {
-            'rank': 'UNKNOWN',
-            'surname': surname,
-            'firstname': firstname,
-            'original': f"UNKNOWN {name_str}"
-        }
-    
     # Extract surname and optional firstname
     firstname = None
     if '(' in remainder and ')' in remainder:
@@ -108,16 +352,75 @@ def parse_name(name_str: str) -> Dict[str, str]:
         'original': name_str
     }
 
+def parse_names(names: pd.Series) -> pd.DataFrame:
+    """
+    Vectorised equivalent of parse_name over a Series of name strings.
+    Ranks are resolved with one pass of the compiled rank pattern over the
+    whole Series. Returns a DataFrame with rank, surname, firstname and
+    original columns, aligned with the input index.
+    """
+    names = names.astype(object).str.strip()
+    
+    # Split off the rank and map whatever spelling was used to its canonical form
+    parts = names.str.extract(RANK_PATTERN)
+    rank = parts['rank'].str.upper().str.replace(r'[\s.\-]+', '', regex=True).map(RANK_LOOKUP)
+    ranked = rank.notna()
+    
+    # Unranked names keep the whole string as the text to split
+    text = parts['remainder'].where(ranked, names)
+    
+    # Names with a firstname in brackets
+    has_brackets = text.str.contains('(', regex=False) & text.str.contains(')', regex=False)
+    bracket_parts = text.str.extract(r'^(?P<before>[^(]*)\((?P<inside>[^(]*)')
+    bracket_surname = bracket_parts['before'].str.strip()
+    bracket_firstname = bracket_parts['inside'].str.replace(')', '', regex=False).str.strip()
+    
+    # Ranked names without brackets are "Firstname Lastname"
+    words = text.str.split()
+    multi_word = ranked & ~has_brackets & (words.str.len() >= 2)
+    
+    surname = text.where(ranked, names)
+    surname = surname.mask(ranked, text.str.strip())
+    surname = surname.mask(multi_word, words.str[-1])
+    surname = surname.mask(has_brackets, bracket_surname)
+    
+    firstname = pd.Series(None, index=names.index, dtype=object)
+    firstname = firstname.mask(multi_word, words.str[:-1].str.join(' '))
+    firstname = firstname.mask(has_brackets, bracket_firstname)
+    
+    return pd.DataFrame({
+        'rank': rank.where(ranked, 'UNKNOWN'),
+        'surname': surname,
+        'firstname': firstname.where(firstname.notna(), None),
+        'original': names.where(ranked, 'UNKNOWN ' + names)
+    }, index=names.index)
+
+def parse_unique_names(names: pd.Series, parse_cache: Optional[ParseCache] = None) -> pd.DataFrame:
+    """
+    Parse a Series of distinct name strings like parse_names, looking each one
+    up in parse_cache first and only parsing (and storing) the misses.
+    """
+    if parse_cache is None:
+        return parse_names(names)
+    
+    signature = rank_table_signature()
+    cached = parse_cache.get_many(names, signature)
+    misses = names[~names.isin(list(cached))]
+    PARSE_CACHE_LOOKUPS.inc(len(cached), result='hit')
+    PARSE_CACHE_LOOKUPS.inc(len(misses), result='miss')
+    fresh = dict(zip(misses, parse_names(misses).to_dict('records'))) if len(misses) else {}
+    parse_cache.put_many(fresh, signature)
+    
+    parsed = {**cached, **fresh}
+    return pd.DataFrame([parsed[name] for name in names], index=names.index, columns=PARSE_FIELDS, dtype=object)
+
 def get_rank_priority(rank: str, is_staff: bool) -> int:
     """
     Get the priority/order of a rank (lower number = higher rank).
     Returns a high number if rank not found.
     """
-    rank_list = STAFF_RANKS if is_staff else CADET_RANKS
-    try:
-        return rank_list.index(rank)
-    except ValueError:
-        return 999  # Unknown rank goes to the end
+    priorities = RESOURCES.staff_priority if is_staff else RESOURCES.cadet_priority
+    return priorities.get(rank, 999)  # Unknown rank goes to the end
 
 def extract_names_from_row(row: pd.Series, start_col: int, end_col: int) -> List[Tuple[str, str]]:
     """
@@ -138,13 +441,135 @@ def extract_names_from_row(row: pd.Series, start_col: int, end_col: int) -> List
                         names.append((name, column_name))
     return names
 
-def process_rolls_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+def extract_name_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vectorised equivalent of calling extract_names_from_row on every row.
+    Returns a long DataFrame with one row per name occurrence and columns
+    'Name', 'Source Column' and 'Row' (row position in df), in the same
+    row-then-column order as the row-by-row extraction.
+    """
+    n_rows, n_cols = df.shape
+    
+    # Flatten cells row by row, keeping the column and row each came from
+    cells = pd.DataFrame({
+        'Name': df.to_numpy(dtype=object).ravel(),
+        'Source Column': np.tile(np.asarray(df.columns, dtype=object), n_rows),
+        'Row': np.repeat(np.arange(n_rows), n_cols)
+    })
+    cells = cells[cells['Name'].notna()]
+    
+    # Split by semicolon, one row per name
+    cells['Name'] = cells['Name'].astype(str).str.split(';')
+    names = cells.explode('Name', ignore_index=True)
+    names['Name'] = names['Name'].astype(object).str.strip()
+    
+    # Skip empty and 'Late'
+    keep = (names['Name'] != '') & (names['Name'].str.lower() != 'late')
+    return names[keep].reset_index(drop=True)
+
+def sort_roll(parsed: pd.DataFrame, staff_col_name: str, exec_col_name: str) -> pd.DataFrame:
+    """
+    Order parsed names Staff -> Execs -> Flights/Others, and within each group
+    by rank (highest first) then surname. Staff ranks are ordered by
+    STAFF_RANKS, everyone else by CADET_RANKS.
+    """
+    is_staff = parsed['source_column'] == staff_col_name
+    group = np.select([is_staff, parsed['source_column'] == exec_col_name], [0, 1], default=2)
+    
+    staff_priority = parsed['rank'].map(RESOURCES.staff_priority)
+    cadet_priority = parsed['rank'].map(RESOURCES.cadet_priority)
+    priority = staff_priority.where(is_staff, cadet_priority).fillna(999)  # Unknown rank goes to the end
+    
+    keys = pd.DataFrame({'group': group, 'priority': priority, 'surname': parsed['surname']})
+    order = keys.sort_values(['group', 'priority', 'surname'], kind='stable').index
+    return parsed.loc[order].reset_index(drop=True)
+
+def find_section_conflicts(section_pairs: pd.DataFrame) -> pd.DataFrame:
+    """
+    List the names ticked in more than one section, from the distinct
+    (Name, Source Column) pairs in first-seen order. Returns columns 'Name',
+    'Kept Section' (the first occurrence, used on the roll) and 'Other Sections'.
+    """
+    conflicted = section_pairs[section_pairs['Name'].duplicated(keep=False)]
+    sections = conflicted.groupby('Name', sort=False)['Source Column'].agg(list)
+    return pd.DataFrame({
+        'Name': sections.index.tolist(),
+        'Kept Section': [cols[0] for cols in sections],
+        'Other Sections': ['; '.join(cols[1:]) for cols in sections]
+    }, columns=['Name', 'Kept Section', 'Other Sections'])
+
+def compute_statistics(section_pairs: pd.DataFrame, output_df: pd.DataFrame,
+                       staff_col_name: str, exec_col_name: str,
+                       consistent_totals: bool = False) -> Dict:
+    """
+    Compute roll statistics from the distinct (Name, Source Column) pairs and
+    the deduplicated output with groupby/crosstab operations.
+    Section counts are distinct names per column over every occurrence, so a
+    name ticked in two sections counts in both; with consistent_totals each
+    name counts only in its first source column and the flight totals add up
+    to the cadet count. Headcounts and rank breakdowns always use each name's
+    first source column.
+    """
+    source = output_df['Source Column']
+    counted = source if consistent_totals else section_pairs['Source Column']
+    section_counts = {col: int(count) for col, count in counted.value_counts(sort=False).items()}
+    
+    staff_count = int((source == staff_col_name).sum())
+    exec_count = int((source == exec_col_name).sum())
+    total_count = len(output_df)
+    
+    # Calculate Flight totals by summing across sub-columns
+    flight1_count = sum(section_counts.get(col, 0) for col in FLIGHT1_COLUMNS)
+    flight2_count = sum(section_counts.get(col, 0) for col in FLIGHT2_COLUMNS)
+    
+    # Rank breakdowns, rows in rank order and columns in roll order
+    ranks = set(output_df['Rank'])
+    sections = set(source)
+    ranks_present = [rank for rank in RESOURCES.rank_order if rank in ranks]
+    rank_by_section = pd.crosstab(output_df['Rank'], source).reindex(
+        index=ranks_present,
+        columns=[col for col in COLUMN_ORDER if col in sections],
+        fill_value=0
+    )
+    groups = source.map(RESOURCES.section_groups).fillna(source)
+    flights = set(groups)
+    rank_by_flight = pd.crosstab(output_df['Rank'], groups).reindex(
+        index=ranks_present,
+        columns=[group for group in RESOURCES.flight_order if group in flights],
+        fill_value=0
+    )
+    
+    unknown_count = int((output_df['Rank'] == 'UNKNOWN').sum())
+    
+    return {
+        'staff_count': staff_count,
+        'cadet_count': total_count - staff_count,
+        'total_count': total_count,
+        'section_counts': section_counts,
+        'flight1_count': flight1_count,
+        'flight2_count': flight2_count,
+        'exec_count': exec_count,
+        'not_listed_count': section_counts.get("Not Listed", 0),
+        'staff_col_name': staff_col_name,
+        'exec_col_name': exec_col_name,
+        'unknown_count': unknown_count,
+        'unknown_rate': unknown_count / total_count if total_count else 0.0,
+        'rank_by_section': rank_by_section,
+        'rank_by_flight': rank_by_flight,
+        'conflicts': find_section_conflicts(section_pairs),
+        'consistent_totals': consistent_totals
+    }
+
+def process_rolls_data(df: pd.DataFrame, parse_cache: Optional[ParseCache] = None,
+                       consistent_totals: bool = False) -> Tuple[pd.DataFrame, Dict]:
     """
     Process the rolls data: extract names, sort them, and collect statistics.
+    If parse_cache is given, previously parsed names are looked up rather than re-parsed.
+    With consistent_totals, section and flight totals count each name once, in
+    its first source column (see compute_statistics).
     Returns (sorted_df, statistics_dict).
     """
-    all_names = []
-    section_counts = {}
+    started = time.perf_counter()
     
     # Rename columns to match hardcoded order
     available_cols = min(len(df.columns), len(COLUMN_ORDER))
@@ -158,137 +583,559 @@ def process_rolls_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
             lambda x: str(x).replace(',', ';') if pd.notna(x) else x
         )
     
-    # Process each row - extract from all columns
-    for idx, row in df.iterrows():
-        extracted = extract_names_from_row(row, 0, len(row) - 1)
-        all_names.extend(extracted)
+    # Extract from all columns in one pass
+    name_table = extract_name_table(df)
     
-    # Remove duplicates while preserving source column info
-    unique_names = {}
-    for name, source_col in all_names:
-        if name not in unique_names:
-            unique_names[name] = source_col
-    
-    # Count by section
-    for name, source_col in all_names:
-        if source_col not in section_counts:
-            section_counts[source_col] = set()
-        section_counts[source_col].add(name)
-    
-    # Convert counts to integers
-    section_counts = {k: len(v) for k, v in section_counts.items()}
+    # Remove duplicates in one pass over the name table, keeping every section a
+    # name appeared in: a name's first (name, section) pair is its first occurrence,
+    # so the roll (first occurrence wins) and the conflict report both come from the pairs
+    section_pairs = name_table.drop_duplicates(['Name', 'Source Column'])
+    unique_names = section_pairs[~section_pairs['Name'].duplicated()]
     
     # Column name references
     staff_col_name = "Staff"
     exec_col_name = "Executive and Seniors"
-
-    # Parsed lists
-    staff_names = []
-    exec_senior_names = []
-    other_names = []
-    
-    for name, source_col in unique_names.items():
-        parsed = parse_name(name)
-        if not parsed:
-            continue
-            
-        parsed['source_column'] = source_col
-        
-        # Categorize based on source column
-        if source_col == staff_col_name:
-            staff_names.append(parsed)
-        elif source_col == exec_col_name:
-            exec_senior_names.append(parsed)
-        else:
-            other_names.append(parsed)
     
-    # Sort each group by rank then surname
-    staff_names.sort(key=lambda x: (get_rank_priority(x['rank'], True), x['surname']))
-    exec_senior_names.sort(key=lambda x: (get_rank_priority(x['rank'], False), x['surname']))
-    other_names.sort(key=lambda x: (get_rank_priority(x['rank'], False), x['surname']))
+    # Parse every unique name in one vectorised pass (names already in the cache are looked up)
+    parsed_names = parse_unique_names(unique_names['Name'].reset_index(drop=True), parse_cache)
+    parsed_names['source_column'] = unique_names['Source Column'].to_numpy()
     
-    # Combine all names in order: Staff -> Execs -> Flights/Others
-    sorted_names = staff_names + exec_senior_names + other_names
+    # Sort Staff -> Execs -> Flights/Others, each by rank then surname
+    sorted_names = sort_roll(parsed_names, staff_col_name, exec_col_name)
     
     # Create output dataframe
-    output_data = []
-    for parsed in sorted_names:
-        output_data.append({
+    output_df = pd.DataFrame({
+        'Rank': sorted_names['rank'].tolist(),
+        'Surname': sorted_names['surname'].tolist(),
+        'First Name': sorted_names['firstname'].fillna('').tolist(),
+        'Full Name': sorted_names['original'].tolist(),
+        'Source Column': sorted_names['source_column'].tolist()
+    })
+    
+    # Calculate statistics
+    statistics = compute_statistics(section_pairs, output_df, staff_col_name, exec_col_name, consistent_totals)
+    
+    PROCESS_SECONDS.observe(time.perf_counter() - started)
+    ROWS_PROCESSED.inc(len(df))
+    NAMES_PROCESSED.inc(statistics['total_count'])
+    UNKNOWN_RANK_NAMES.inc(statistics['unknown_count'])
+    
+    return output_df, statistics
+
+def _normalise_key_part(values: pd.Series) -> pd.Series:
+    """Casefold and collapse whitespace so keys match regardless of typing."""
+    return values.fillna('').astype(str).str.casefold().str.split().str.join(' ')
+
+def read_nominal_roll(file_bytes: bytes, file_name: str) -> pd.DataFrame:
+    """
+    Read a nominal roll (the squadron member list) from CSV or Excel.
+    Accepts either Rank/Surname/First Name columns (as in the formatted output)
+    or a single column of names in roll format, plus an optional Flight or
+    Section column. Returns a DataFrame with Rank, Surname, First Name and Flight.
+    """
+    if file_name.lower().endswith('.csv'):
+        raw = pd.read_csv(io.BytesIO(file_bytes), dtype=str)
+    else:
+        raw = pd.read_excel(io.BytesIO(file_bytes), dtype=str)
+    columns = {str(col).strip().casefold(): col for col in raw.columns}
+    
+    if 'surname' in columns:
+        ranks = raw[columns['rank']] if 'rank' in columns else pd.Series('', index=raw.index)
+        rank_keys = ranks.fillna('').str.upper().str.replace(r'[\s.\-]+', '', regex=True)
+        firstname_col = columns.get('first name', columns.get('firstname'))
+        nominal = pd.DataFrame({
+            'Rank': rank_keys.map(RANK_LOOKUP).fillna('UNKNOWN'),
+            'Surname': raw[columns['surname']].fillna('').str.strip(),
+            'First Name': raw[firstname_col].fillna('').str.strip() if firstname_col else ''
+        })
+    elif len(raw.columns) > 0:
+        parsed = parse_names(raw.iloc[:, 0].fillna(''))
+        nominal = pd.DataFrame({
             'Rank': parsed['rank'],
             'Surname': parsed['surname'],
-            'First Name': parsed['firstname'] if parsed['firstname'] else '',
-            'Full Name': parsed['original'],
-            'Source Column': parsed['source_column']
+            'First Name': parsed['firstname'].fillna('')
         })
+    else:
+        raise ValueError("Nominal roll is empty")
     
-    output_df = pd.DataFrame(output_data)
+    flight_col = columns.get('flight', columns.get('section'))
+    if flight_col is not None:
+        flights = raw[flight_col].fillna('').str.strip()
+        nominal['Flight'] = flights.map(RESOURCES.section_groups).fillna(flights).replace('', 'Unassigned')
+    else:
+        nominal['Flight'] = 'Unassigned'
     
-    # Calculate statistics
-    staff_count = len(staff_names)
-    cadet_count = len(exec_senior_names) + len(other_names)
-    total_count = len(sorted_names)
+    nominal = nominal[nominal['Surname'] != '']
+    return nominal.reset_index(drop=True)
+
+# Join keys tried in order: exact, then ignoring rank (promotions, unknown
+# ranks), then ignoring first name (attendance often omits it). Keys without
+# First Name only match when the attendee or the member has no first name.
+RECONCILE_KEYS = [
+    ('Rank', 'Surname', 'First Name'),
+    ('Surname', 'First Name'),
+    ('Rank', 'Surname'),
+]
+
+def _join_keys(df: pd.DataFrame, fields: Tuple[str, ...]) -> pd.Series:
+    """Combine normalised fields into one hashable key per row."""
+    parts = [_normalise_key_part(df[field]) for field in fields]
+    key = parts[0]
+    for part in parts[1:]:
+        key = key + '|' + part
+    return key
+
+def build_nominal_index(nominal: pd.DataFrame) -> Dict[Tuple[str, ...], pd.Series]:
+    """
+    Index the nominal roll once for each join key: key -> row position.
+    Keys shared by more than one member are left out so they never match
+    the wrong person.
+    """
+    index = {}
+    for fields in RECONCILE_KEYS:
+        keys = _join_keys(nominal, fields)
+        unique = keys[~keys.duplicated(keep=False)]
+        index[fields] = pd.Series(unique.index, index=unique.to_numpy())
+    return index
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def load_nominal_roll(file_bytes: bytes, file_name: str, signature: str) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Read and index a nominal roll. Cached process-wide by file content and
+    rank table signature, so weekly reconciliations against the same roll
+    reuse the index from any session. The result is shared; don't modify it.
+    """
+    nominal = read_nominal_roll(file_bytes, file_name)
+    return nominal, build_nominal_index(nominal)
+
+def reconcile_attendance(output_df: pd.DataFrame, nominal: pd.DataFrame,
+                         nominal_index: Dict[Tuple[str, ...], pd.Series]) -> Dict[str, pd.DataFrame]:
+    """
+    Hash-join the processed roll against the nominal roll.
+    Returns 'present' and 'absent' (nominal roll members) and 'not_on_roll'
+    (attendees with no matching member), each with a Flight column, plus a
+    'summary' of counts per flight.
+    When several attendees match the same member, the match on the earliest
+    key in RECONCILE_KEYS claims it and the others are not on the roll.
+    """
+    matched = pd.Series(-1, index=output_df.index)
+    priority = pd.Series(len(RECONCILE_KEYS), index=output_df.index)
+    has_firstname = _normalise_key_part(output_df['First Name']) != ''
+    member_has_firstname = _normalise_key_part(nominal['First Name']) != ''
+    for key_priority, fields in enumerate(RECONCILE_KEYS):
+        pending = matched < 0
+        if not pending.any():
+            break
+        positions = _join_keys(output_df[pending], fields).map(nominal_index[fields]).fillna(-1).astype(int)
+        if 'First Name' not in fields:
+            # Never match two different first names on rank and surname alone
+            conflicting = has_firstname[pending] & positions.map(member_has_firstname).fillna(False).astype(bool)
+            positions = positions.mask(conflicting, -1)
+        matched[pending] = positions
+        priority[pending & (matched >= 0)] = key_priority
     
-    # Calculate Flight totals by summing across sub-columns
-    flight1_count = sum(section_counts.get(col, 0) for col in FLIGHT1_COLUMNS)
-    flight2_count = sum(section_counts.get(col, 0) for col in FLIGHT2_COLUMNS)
-    exec_count = len(exec_senior_names)
-    not_listed_count = section_counts.get(not_listed_col, 0)
+    attended = output_df.assign(member=matched.to_numpy(), priority=priority.to_numpy())
+    candidates = attended[attended['member'] >= 0].sort_values('priority', kind='stable')
+    found = candidates[~candidates['member'].duplicated()].sort_index()
     
-    statistics = {
-        'staff_count': staff_count,
-        'cadet_count': cadet_count,
-        'total_count': total_count,
-        'section_counts': section_counts,
-        'flight1_count': flight1_count,
-        'flight2_count': flight2_count,
-        'exec_count': exec_count,
-        'not_listed_count': not_listed_count,
-        'staff_col_name': staff_col_name,
-        'exec_col_name': exec_col_name
+    present = nominal.loc[found['member']].assign(**{'Source Column': found['Source Column'].to_numpy()})
+    absent = nominal.drop(index=found['member'])
+    not_on_roll = attended[~attended.index.isin(found.index)].drop(columns=['member', 'priority'])
+    not_on_roll = not_on_roll.assign(Flight=not_on_roll['Source Column'].map(RESOURCES.section_groups).fillna('Unassigned'))
+    
+    summary = pd.DataFrame({
+        'Present': present['Flight'].value_counts(),
+        'Absent': absent['Flight'].value_counts(),
+        'Not On Roll': not_on_roll['Flight'].value_counts()
+    }).fillna(0).astype(int)
+    order = RESOURCES.flight_order
+    summary = summary.reindex(sorted(summary.index, key=lambda flight: (order.get(flight, len(order)), flight)))
+    summary.index.name = 'Flight'
+    
+    return {
+        'present': present.reset_index(drop=True),
+        'absent': absent.reset_index(drop=True),
+        'not_on_roll': not_on_roll.reset_index(drop=True),
+        'summary': summary
     }
+
+# Attendance columns (indices 8-20):
+# 8: Staff
+# 9: Executive and Seniors
+# 10: 1 Flight
+# 11-14: 1 Alpha, 1 Bravo, 1 Charlie, 1 Delta
+# 15: 2 Flight
+# 16-19: 2 Alpha, 2 Bravo, 2 Charlie, 2 Delta
+# 20: Cadet Names Not Listed
+ATTENDANCE_COLUMNS = list(range(8, 21))
+
+# Forms submission columns (indices 0-7): ID, start and completion times, etc.
+SUBMISSION_COLUMNS = list(range(0, 8))
+
+# Columnar roll files (written by convert_rolls.py), in the same column layout
+PARQUET_TYPES = ['parquet']
+ARROW_IPC_TYPES = ['arrow', 'feather']
+COLUMNAR_TYPES = PARQUET_TYPES + ARROW_IPC_TYPES
+ROLL_FILE_TYPES = ['xlsx', 'xls', 'csv'] + COLUMNAR_TYPES
+
+# Upload limits checked before a file is parsed
+MAX_UPLOAD_BYTES = int(float(os.environ.get('AAFC_MAX_UPLOAD_MB', '20')) * 1024 * 1024)
+MAX_UPLOAD_ROWS = int(os.environ.get('AAFC_MAX_UPLOAD_ROWS', '5000'))
+
+# Bytes of a CSV read to find the header and estimate the row count
+CSV_SAMPLE_BYTES = 64 * 1024
+
+# Processing cost per row assumed until real timings have been recorded
+DEFAULT_SECONDS_PER_ROW = 0.0005
+
+class UploadValidationError(ValueError):
+    """Raised when an upload is rejected before parsing."""
+
+def _file_size(file) -> int:
+    """Size of an uploaded file or stream in bytes, leaving the position at the start."""
+    size = getattr(file, 'size', None)
+    if size is None:
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+    file.seek(0)
+    return size
+
+def _scan_excel(file) -> Tuple[Optional[int], List[str], str]:
+    """Read the first sheet's dimensions and header row without loading the data."""
+    try:
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError, ValueError) as e:
+        raise UploadValidationError(f"Not a valid Excel workbook ({e})")
+    try:
+        sheet = workbook.worksheets[0]
+        header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header = [str(value) if value is not None else '' for value in header_row]
+        max_row = sheet.max_row
+        if max_row is None:
+            # No stored dimensions - count rows, but stop as soon as the limit is passed
+            max_row = 0
+            for _ in sheet.iter_rows(values_only=True):
+                max_row += 1
+                if max_row > MAX_UPLOAD_ROWS + 1:
+                    break
+        return max(max_row - 1, 0), header, sheet.title
+    finally:
+        workbook.close()
+
+def _scan_csv(file, size: int) -> Tuple[int, List[str]]:
+    """Read the header from the start of a CSV and estimate its data row count."""
+    sample = file.read(CSV_SAMPLE_BYTES)
+    if isinstance(sample, str):
+        sample = sample.encode('utf-8')
+    text = sample.decode('utf-8-sig', errors='replace')
+    complete = len(sample) >= size
+    if not complete:
+        text = text[:text.rfind('\n') + 1]  # Drop the partial last line
     
-    return output_df, statistics
+    records = list(csv.reader(io.StringIO(text)))
+    if not records:
+        raise UploadValidationError("The CSV file is empty")
+    header, data_rows = records[0], len(records) - 1
+    if complete or data_rows == 0:
+        return data_rows, header
+    # Scale the sampled rows up to the full file size
+    sampled_bytes = len(text.encode('utf-8'))
+    return int(data_rows * size / sampled_bytes), header
+
+def _arrow_source(file):
+    """
+    Arrow input for a roll file: files on disk (paths or files opened with
+    open()) are memory-mapped; in-memory uploads are wrapped without copying.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        return pa.memory_map(os.fspath(file))
+    if isinstance(file, io.BufferedReader):
+        return pa.memory_map(file.name)
+    file.seek(0)
+    data = file.getbuffer() if isinstance(file, io.BytesIO) else file.read()
+    return pa.BufferReader(pa.py_buffer(data))
+
+def _open_columnar(file, file_type: str):
+    """Open a Parquet or Arrow IPC file, reading only its footer/schema."""
+    if file_type in PARQUET_TYPES:
+        return pq.ParquetFile(_arrow_source(file))
+    return pa.ipc.open_file(_arrow_source(file))
+
+def _scan_columnar(file, file_type: str) -> Tuple[int, List[str]]:
+    """Read the row count and column names from a Parquet footer or Arrow IPC schema."""
+    try:
+        reader = _open_columnar(file, file_type)
+    except (pa.ArrowException, OSError) as e:
+        kind = "Parquet" if file_type in PARQUET_TYPES else "Arrow IPC"
+        raise UploadValidationError(f"Not a valid {kind} file ({e})")
+    if file_type in PARQUET_TYPES:
+        return reader.metadata.num_rows, reader.schema_arrow.names
+    rows = sum(reader.get_batch(idx).num_rows for idx in range(reader.num_record_batches))
+    return rows, reader.schema.names
+
+def prevalidate_upload(file, file_type: str) -> Dict:
+    """
+    Cheap pre-flight check of an upload before it is parsed: enforces the size
+    and row limits and checks there are enough columns for the attendance
+    data, reading only workbook metadata, the first part of a CSV, or the
+    footer/schema of a Parquet or Arrow file.
+    Returns a summary (size_bytes, rows, columns, header, estimated_seconds);
+    raises UploadValidationError if the file should be rejected.
+    """
+    size = _file_size(file)
+    if size == 0:
+        raise UploadValidationError("The uploaded file is empty")
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadValidationError(
+            f"File is {size / 2**20:.1f} MB; the limit is {MAX_UPLOAD_BYTES / 2**20:.0f} MB"
+        )
+    
+    sheet_name = None
+    try:
+        if file_type == 'csv':
+            rows, header = _scan_csv(file, size)
+        elif file_type == 'xlsx':
+            rows, header, sheet_name = _scan_excel(file)
+        elif file_type in COLUMNAR_TYPES:
+            rows, header = _scan_columnar(file, file_type)
+        else:
+            # Legacy .xls has no cheap metadata reader; only the size is checked
+            return {'size_bytes': size, 'rows': None, 'columns': None, 'header': [], 'estimated_seconds': None}
+    finally:
+        file.seek(0)
+    
+    required_columns = max(ATTENDANCE_COLUMNS) + 1
+    if len(header) < required_columns:
+        where = f"sheet '{sheet_name}'" if sheet_name else "the file"
+        raise UploadValidationError(
+            f"Expected at least {required_columns} columns ({len(COLUMN_ORDER)} attendance columns "
+            f"starting at column {min(ATTENDANCE_COLUMNS) + 1}), but {where} has {len(header)}"
+        )
+    if rows > MAX_UPLOAD_ROWS:
+        raise UploadValidationError(f"File has about {rows} rows; the limit is {MAX_UPLOAD_ROWS}")
+    
+    # Estimate from timings recorded so far in this process
+    rows_seen = ROWS_PROCESSED.value()
+    seconds_per_row = PROCESS_SECONDS.sum / rows_seen if rows_seen else DEFAULT_SECONDS_PER_ROW
+    
+    return {
+        'size_bytes': size,
+        'rows': rows,
+        'columns': len(header),
+        'header': header,
+        'estimated_seconds': rows * seconds_per_row
+    }
+
+def read_roll_file(file, file_type: str, include_timestamps: bool = False) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Read a roll file, keeping only the attendance columns.
+    With include_timestamps, the submission columns are read in the same pass
+    and returned separately; otherwise they are never loaded.
+    Returns (attendance_df, submission_df or None).
+    """
+    columns_to_keep = (SUBMISSION_COLUMNS if include_timestamps else []) + ATTENDANCE_COLUMNS
+    
+    if file_type == 'csv':
+        df = pd.read_csv(file, usecols=columns_to_keep)
+    elif file_type in PARQUET_TYPES:
+        # Only the kept column chunks are read from the (memory-mapped) file
+        parquet = _open_columnar(file, file_type)
+        names = parquet.schema_arrow.names
+        df = parquet.read(columns=[names[idx] for idx in columns_to_keep]).to_pandas()
+    elif file_type in ARROW_IPC_TYPES:
+        # Zero-copy: selecting columns only slices the memory-mapped buffers
+        df = _open_columnar(file, file_type).read_all().select(columns_to_keep).to_pandas()
+    else:
+        df = pd.read_excel(file, usecols=columns_to_keep)
+    
+    if not include_timestamps:
+        return df, None
+    n_submission = len(SUBMISSION_COLUMNS)
+    return df.iloc[:, n_submission:].copy(), df.iloc[:, :n_submission]
+
+def find_roll_files(inputs: List[str], file_types: Optional[List[str]] = None) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a sorted list of roll
+    files with one of file_types (default ROLL_FILE_TYPES), for batch tools.
+    """
+    extensions = tuple(f".{file_type}" for file_type in (file_types or ROLL_FILE_TYPES))
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(os.path.join(item, name) for name in os.listdir(item))
+        else:
+            paths.extend(glob.glob(item) or [item])
+    return sorted(path for path in set(paths) if path.lower().endswith(extensions))
+
+def write_columnar_roll(roll: pd.DataFrame, target, file_type: str = 'parquet') -> None:
+    """
+    Write a full roll (submission and attendance columns, as read from the
+    Forms export) to target as Parquet or Arrow IPC, for read_roll_file.
+    Text columns are stored as strings so mixed cells (e.g. a number typed
+    into a name column) don't break the column type.
+    """
+    roll = roll.copy()
+    roll.columns = [str(col) for col in roll.columns]
+    for col in roll.columns:
+        values = roll[col]
+        if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values)):
+            roll[col] = values.astype(str).where(values.notna(), None)
+    table = pa.Table.from_pandas(roll, preserve_index=False)
+    if file_type in PARQUET_TYPES:
+        pq.write_table(table, target)
+    else:
+        # Uncompressed so readers can memory-map the columns without decoding
+        with pa.ipc.new_file(target, table.schema) as writer:
+            writer.write_table(table)
+
+def _parse_form_times(values: pd.Series) -> pd.Series:
+    """
+    Parse form timestamps. Datetimes and ISO strings are read as they are;
+    anything else (e.g. d/m/yyyy from an Australian CSV export) is read day
+    first. Unparseable values become NaT.
+    """
+    times = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    unparsed = times.isna() & values.notna()
+    if unparsed.any():
+        times = times.combine_first(pd.to_datetime(values[unparsed], errors='coerce', format='mixed', dayfirst=True))
+    return times
+
+def load_submission_times(submission_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build a sorted DatetimeIndex of form completion times from the submission
+    columns. Columns are found by header ('Start time', 'Completion time'),
+    falling back to the Forms export positions (1 and 2).
+    Returns a DataFrame indexed by completion time with the original 'Row'
+    position and 'Start' time; rows without a valid completion time are dropped.
+    """
+    headers = {str(col).strip().casefold(): col for col in submission_df.columns}
+    start_col = headers.get('start time', submission_df.columns[1])
+    completion_col = headers.get('completion time', submission_df.columns[2])
+    
+    times = pd.DataFrame({
+        'Row': np.arange(len(submission_df)),
+        'Start': _parse_form_times(submission_df[start_col]).to_numpy(),
+    }, index=pd.DatetimeIndex(_parse_form_times(submission_df[completion_col]), name='Completed'))
+    
+    times = times[times.index.notna()]
+    return times.sort_index(kind='stable')
+
+def compute_submission_analytics(submission_df: pd.DataFrame, attendance_df: pd.DataFrame,
+                                 bin_minutes: int = 5) -> Dict:
+    """
+    Submission-time analytics for a roll whose attendance columns have
+    already been renamed by process_rolls_data. Returns a dict with:
+    'times' (load_submission_times), 'arrivals' (submissions and names signing
+    in for the first time per time bin), 'sign_in_curves' (cumulative distinct
+    names per section over time, ending at the section counts),
+    'late_counts' (per section: submissions marked Late and the names in
+    them) and the first/last submission times.
+    """
+    times = load_submission_times(submission_df)
+    name_table = extract_name_table(attendance_df)
+    
+    # Only a name's first sign-in counts: order the names by completion time,
+    # then keep the first occurrence per section (curves) and overall (arrivals)
+    completion_order = pd.Series(np.arange(len(times)), index=times['Row'].to_numpy())
+    ordered = name_table.assign(order=name_table['Row'].map(completion_order)).dropna(subset=['order'])
+    ordered = ordered.sort_values('order', kind='stable')
+    first_in_section = ordered.drop_duplicates(['Name', 'Source Column'])
+    first_overall = ordered.drop_duplicates('Name')
+    
+    # New names per submission and section, in completion order
+    per_row = pd.crosstab(first_in_section['Row'], first_in_section['Source Column'])
+    per_row = per_row.reindex(index=times['Row'], fill_value=0)
+    per_row = per_row[[col for col in COLUMN_ORDER if col in per_row.columns]]
+    per_row.index = times.index
+    
+    sign_in_curves = per_row.cumsum()
+    
+    new_names = first_overall['Row'].value_counts().reindex(times['Row'], fill_value=0)
+    arrivals = pd.DataFrame({
+        'Submissions': pd.Series(1, index=times.index),
+        'Names': new_names.to_numpy()
+    }, index=times.index).resample(f'{bin_minutes}min').sum()
+    
+    # Cells that include a 'Late' token mark the names in them as late
+    cells = attendance_df.astype(object)
+    late_cells = cells.apply(
+        lambda col: col.where(col.notna(), '').astype(str)
+        .str.contains(r'(?:^|;)\s*late\s*(?:;|$)', case=False, regex=True)
+    )
+    late_flags = late_cells.stack()
+    late_flags = late_flags[late_flags]
+    late_keys = pd.MultiIndex.from_arrays([
+        attendance_df.index.get_indexer(late_flags.index.get_level_values(0)),
+        late_flags.index.get_level_values(1)
+    ])
+    name_keys = pd.MultiIndex.from_frame(name_table[['Row', 'Source Column']])
+    late_names = name_table[name_keys.isin(late_keys)]
+    
+    late_counts = pd.DataFrame({
+        'Late Submissions': late_cells.sum(),
+        'Late Names': late_names['Source Column'].value_counts()
+    }).reindex(attendance_df.columns).fillna(0).astype(int)
+    late_counts.index.name = 'Section'
+    
+    return {
+        'times': times,
+        'arrivals': arrivals,
+        'sign_in_curves': sign_in_curves,
+        'late_counts': late_counts,
+        'first_submission': times.index.min(),
+        'last_submission': times.index.max()
+    }
 
 def main():
+    start_metrics_exporters()
+    
     st.title("📋 AAFC Electronic Rolls")
-    st.markdown("Upload your AAFC rolls file (Excel or CSV format) to process and format the attendance data.")
+    st.markdown("Upload your AAFC rolls file (Excel, CSV, or Parquet/Arrow converted with convert_rolls.py) to process and format the attendance data.")
     
     # File uploader
-    uploaded_file = st.file_uploader("Choose a file", type=['xlsx', 'xls', 'csv'])
+    uploaded_file = st.file_uploader("Choose a file", type=ROLL_FILE_TYPES)
+    
+    analytics_mode = st.checkbox(
+        "⏱️ Submission time analytics",
+        help="Also read the form start/completion times to chart arrivals and late sign-ins"
+    )
+    consistent_totals = st.checkbox(
+        "🧮 Count each cadet in one section only",
+        help="Cadets ticked in several sections are counted only in the first, so the flight totals add up to the cadet count"
+    )
     
     if uploaded_file is not None:
         try:
             # Determine file type and read
             file_type = uploaded_file.name.split('.')[-1].lower()
-            
-            # Columns to keep: Attendance columns (indices 8-20)
-            # 8: Staff
-            # 9: Executive and Seniors
-            # 10: 1 Flight
-            # 11-14: 1 Alpha, 1 Bravo, 1 Charlie, 1 Delta
-            # 15: 2 Flight
-            # 16-19: 2 Alpha, 2 Bravo, 2 Charlie, 2 Delta
-            # 20: Cadet Names Not Listed
-            columns_to_keep = list(range(8, 21))
-            
-            if file_type == 'csv':
-                df = pd.read_csv(uploaded_file, usecols=columns_to_keep)
-            else:
-                df = pd.read_excel(uploaded_file, usecols=columns_to_keep)
+            preflight = prevalidate_upload(uploaded_file, file_type)
+            with FILE_READ_SECONDS.time():
+                df, submission_times = read_roll_file(uploaded_file, file_type, include_timestamps=analytics_mode)
             
             st.success(f"File uploaded successfully! Found {len(df)} rows.")
             
             st.info(f"Processing {len(df)} record(s)")
+            if preflight['estimated_seconds'] is not None and preflight['estimated_seconds'] >= 1:
+                st.caption(f"Estimated processing time: {preflight['estimated_seconds']:.0f} s")
             
             # Process the data
             with st.spinner("Processing rolls data..."):
-                output_df, stats = process_rolls_data(df)
+                output_df, stats = process_rolls_data(df, parse_cache=get_parse_cache(),
+                                                      consistent_totals=consistent_totals)
             
             # Check for UNKNOWN records and display warning
-            unknown_count = len(output_df[output_df['Rank'] == 'UNKNOWN'])
+            unknown_count = stats['unknown_count']
             if unknown_count > 0:
                 st.warning(f"⚠️ Warning: Found {unknown_count} record(s) with UNKNOWN rank. These records may need to be reviewed and corrected.")
             
+            # Names ticked in more than one section
+            conflicts = stats['conflicts']
+            if len(conflicts) > 0:
+                counted = "once, in the kept section" if stats['consistent_totals'] else "in every section they were ticked in"
+                st.warning(f"⚠️ Warning: {len(conflicts)} name(s) were ticked in more than one section. They appear on the roll once and are counted {counted}.")
+                with st.expander("🔀 Section Conflicts"):
+                    st.dataframe(conflicts, use_container_width=True, hide_index=True)
+            
             # Display statistics in tiles
             st.markdown("---")
             st.subheader("📊 Statistics")
@@ -320,6 +1167,36 @@ def main():
             with col8:
                 st.metric("📝 Not Listed", stats.get('not_listed_count', 0))
             
+            # Rank breakdowns (already computed with the statistics)
+            with st.expander("🎖️ Rank Breakdowns"):
+                st.metric("❓ Unknown Rank Rate", f"{stats['unknown_rate']:.1%}")
+                st.markdown("**Rank by Flight**")
+                st.dataframe(stats['rank_by_flight'], use_container_width=True)
+                st.markdown("**Rank by Section**")
+                st.dataframe(stats['rank_by_section'], use_container_width=True)
+            
+            # Submission time analytics (only read when enabled)
+            if submission_times is not None:
+                analytics = compute_submission_analytics(submission_times, df)
+                st.markdown("---")
+                st.subheader("⏱️ Submission Times")
+                if analytics['times'].empty:
+                    st.warning("No valid completion times found in the uploaded file.")
+                else:
+                    col9, col10, col11 = st.columns(3)
+                    with col9:
+                        st.metric("🕐 First Submission", f"{analytics['first_submission']:%H:%M}")
+                    with col10:
+                        st.metric("🕘 Last Submission", f"{analytics['last_submission']:%H:%M}")
+                    with col11:
+                        st.metric("⏰ Late Sign-ins", int(analytics['late_counts']['Late Names'].sum()))
+                    st.markdown("**Arrivals**")
+                    st.bar_chart(analytics['arrivals'])
+                    st.markdown("**Sign-ins by Section**")
+                    st.line_chart(analytics['sign_in_curves'])
+                    st.markdown("**Late Sign-ins by Section**")
+                    st.dataframe(analytics['late_counts'], use_container_width=True)
+            
             # Display the processed data
             st.markdown("---")
             st.subheader("📝 Processed Roll")
@@ -342,14 +1219,49 @@ def main():
                 use_container_width=True
             )
             
+            # Optional reconciliation against the squadron's nominal roll
+            st.markdown("---")
+            st.subheader("🧾 Nominal Roll Reconciliation")
+            nominal_file = st.file_uploader(
+                "Upload a nominal roll (optional) to list absentees",
+                type=['xlsx', 'xls', 'csv'],
+                key="nominal_roll"
+            )
+            if nominal_file is not None:
+                nominal, nominal_index = load_nominal_roll(
+                    nominal_file.getvalue(), nominal_file.name, rank_table_signature()
+                )
+                reconciliation = reconcile_attendance(output_df, nominal, nominal_index)
+                st.dataframe(reconciliation['summary'], use_container_width=True)
+                
+                tab_absent, tab_present, tab_not_on_roll = st.tabs(["Absent", "Present", "Not On Roll"])
+                with tab_absent:
+                    st.dataframe(reconciliation['absent'], use_container_width=True)
+                    st.download_button(
+                        label="⬇️ Download Absentees CSV",
+                        data=reconciliation['absent'].to_csv(index=False),
+                        file_name="Absentees.csv",
+                        mime="text/csv"
+                    )
+                with tab_present:
+                    st.dataframe(reconciliation['present'], use_container_width=True)
+                with tab_not_on_roll:
+                    st.dataframe(reconciliation['not_on_roll'], use_container_width=True)
+            
+            UPLOADS.inc(outcome='ok')
+            
+        except UploadValidationError as e:
+            UPLOADS.inc(outcome='rejected')
+            st.error(f"❌ File rejected: {str(e)}")
         except Exception as e:
+            UPLOADS.inc(outcome='error')
             st.error(f"Error processing file: {str(e)}")
             st.exception(e)
     else:
         # Show instructions
         st.info("""
         ### Instructions
-        1. Upload a CSV or Excel file with AAFC roll data
+        1. Upload a CSV, Excel, Parquet or Arrow file with AAFC roll data
         2. The file should contain attendance columns:
            - Staff, Executive and Seniors
            - 1 Flight, 1 Alpha–Delta
@@ -0,0 +1,85 @@
+"""
+One-time conversion of an archive of roll files to Parquet or Arrow IPC.
+
+Excel is slow to re-read (every cell goes through openpyxl), so past rolls
+can be converted once and then read by the app and roll_reports.py straight
+from the columnar file, memory-mapped and only the attendance columns.
+All columns are kept, so submission time analytics still work.
+
+Usage:
+    python convert_rolls.py archive/
+    python convert_rolls.py archive/*.xlsx --format arrow --output-dir archive_arrow/
+
+Files already converted (target newer than the source) are skipped unless
+--force is given.
+"""
+import argparse
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+from app import write_columnar_roll, find_roll_files
+
+SOURCE_TYPES = ['xlsx', 'xls', 'csv']
+
+def target_path(source: str, file_type: str, output_dir: str = None) -> str:
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_dir or os.path.dirname(source), f"{stem}.{file_type}")
+
+def convert_roll_file(source: str, target: str, file_type: str = 'parquet') -> int:
+    """Convert one roll file, keeping every column. Returns the number of rows."""
+    if source.lower().endswith('.csv'):
+        roll = pd.read_csv(source)
+    else:
+        roll = pd.read_excel(source)
+    write_columnar_roll(roll, target, file_type)
+    return len(roll)
+
+def convert_archive(paths: List[str], file_type: str = 'parquet', output_dir: str = None,
+                    force: bool = False) -> List[Dict]:
+    """
+    Convert each file in paths, skipping those whose target is up to date.
+    Returns one result per file: source, target, status ('converted',
+    'skipped' or 'failed'), and rows or error.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    results = []
+    for source in paths:
+        target = target_path(source, file_type, output_dir)
+        result = {'source': source, 'target': target}
+        if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+            results.append({**result, 'status': 'skipped'})
+            continue
+        try:
+            rows = convert_roll_file(source, target, file_type)
+        except Exception as e:
+            results.append({**result, 'status': 'failed', 'error': str(e)})
+            continue
+        results.append({**result, 'status': 'converted', 'rows': rows})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert .xlsx/.csv roll archives to Parquet or Arrow IPC")
+    parser.add_argument('inputs', nargs='+', help="Roll files, directories or glob patterns")
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet',
+                        help="Output format (default parquet; arrow is larger but memory-maps without decoding)")
+    parser.add_argument('--output-dir', help="Write converted files here (default: next to each source file)")
+    parser.add_argument('--force', action='store_true', help="Convert even if the target is up to date")
+    args = parser.parse_args()
+
+    paths = find_roll_files(args.inputs, SOURCE_TYPES)
+    if not paths:
+        parser.error("No .xlsx, .xls or .csv roll files found")
+    results = convert_archive(paths, args.format, args.output_dir, args.force)
+    for status in ('converted', 'skipped', 'failed'):
+        count = sum(result['status'] == status for result in results)
+        if count:
+            print(f"{status.capitalize()}: {count}")
+    for result in results:
+        if result['status'] == 'failed':
+            print(f"  Failed: {result['source']}: {result['error']}")
+
+if __name__ == "__main__":
+    main()
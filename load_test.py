@@ -0,0 +1,227 @@
+"""
+Load test for the Streamlit app: N concurrent sessions uploading generated rolls.
+
+Each simulated session is a streamlit.testing AppTest running app.py, so every
+rerun executes the whole script exactly as the server would. AppTest swaps in
+its own process-wide runtime for each run, so sessions can't safely run in
+threads of one process; each runs in its own worker process instead, and the
+workers share the on-disk parse cache. AppTest can't drive the file uploader,
+so st.file_uploader is replaced with a stand-in that returns the file stored
+in the session's own session_state.
+
+Usage:
+    python load_test.py --sessions 20 --reruns 5 --rows 60
+    python load_test.py --sessions 50 --format xlsx --analytics --json results.json
+
+Reports p50/p95/max latency per rerun and throughput from an untraced pass,
+then the Python heap retained per session from a second pass over the same
+files under tracemalloc (pass --no-memory to skip it). Exceptions raised in
+a session's script thread count as errors.
+"""
+import argparse
+import gc
+import io
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Tuple
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from synthetic_rolls import random_roll_file
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+# Session state key holding {uploader key: (file name, file bytes)}
+UPLOADS_KEY = '_load_test_uploads'
+
+# Exceptions raised in script threads of this worker since the last rerun
+_thread_errors: List[str] = []
+
+class _Upload(io.BytesIO):
+    """Minimal stand-in for Streamlit's UploadedFile."""
+
+    def __init__(self, name: str, data: bytes):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+def _file_uploader(label, type=None, accept_multiple_files=False, key=None, *args, **kwargs):
+    """Return the current session's file for this uploader, as the real widget would."""
+    upload = st.session_state.get(UPLOADS_KEY, {}).get(key)
+    return _Upload(*upload) if upload else None
+
+def _record_thread_exception(args: threading.ExceptHookArgs) -> None:
+    """Keep exceptions that escape a script thread, which AppTest doesn't report."""
+    _thread_errors.append(f"{args.exc_type.__name__}: {args.exc_value}")
+
+def _init_worker() -> None:
+    """Install the uploader stand-in and thread exception hook in a worker process."""
+    st.file_uploader = _file_uploader
+    threading.excepthook = _record_thread_exception
+
+def _warm_up(barrier, file: Tuple[str, bytes], analytics: bool, timeout: float) -> None:
+    """
+    Run one session so imports, compiling app.py and the process-wide caches
+    aren't charged to the first measured session, then wait for the other
+    workers; blocking here makes every worker take exactly one warm-up.
+    """
+    run_session(*file, reruns=1, analytics=analytics, timeout=timeout)
+    _thread_errors.clear()
+    barrier.wait()
+
+def run_session(file_name: str, file_bytes: bytes, reruns: int, analytics: bool, timeout: float) -> Dict:
+    """
+    Drive one session: upload, then rerun the script reruns - 1 more times
+    (ticking the analytics checkbox on the second run if requested).
+    Returns per-rerun latencies, any exception messages and the AppTest.
+    """
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state[UPLOADS_KEY] = {None: (file_name, file_bytes)}
+    latencies = []
+    errors = []
+    for rerun in range(reruns):
+        if analytics and rerun == 1:
+            if not at.checkbox:  # The first run failed before drawing the page
+                errors.append("No analytics checkbox to tick")
+                break
+            at.checkbox[0].check()
+        start = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:  # Timeouts and script errors count as failed reruns
+            errors.append(str(e))
+            continue
+        finally:
+            errors.extend(_thread_errors)
+            _thread_errors.clear()
+        latencies.append(time.perf_counter() - start)
+        errors.extend(str(exception.message) for exception in at.exception)
+        errors.extend(str(error.value) for error in at.error)
+    return {'latencies': latencies, 'errors': errors, 'app': at}
+
+def _timed_session(file: Tuple[str, bytes], reruns: int, analytics: bool, timeout: float) -> Dict:
+    """Run one session in a worker and return its latencies and errors."""
+    result = run_session(*file, reruns=reruns, analytics=analytics, timeout=timeout)
+    del result['app']
+    return result
+
+def _traced_session(file: Tuple[str, bytes], reruns: int, analytics: bool, timeout: float) -> Tuple[int, int]:
+    """Run one session in a worker under tracemalloc; returns (heap retained, peak) in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = run_session(*file, reruns=reruns, analytics=analytics, timeout=timeout)  # Keep the AppTest alive
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current - baseline, peak - baseline
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_load_test(sessions: int = 10, reruns: int = 3, rows: int = 40, file_format: str = 'csv',
+                  analytics: bool = False, trace_memory: bool = True, timeout: float = 60,
+                  seed: int = 215) -> Dict:
+    """
+    Run the load test and return a summary dict (latencies in seconds, memory in bytes).
+    Latency is measured without tracing; with trace_memory, memory is measured
+    in a second, traced pass over the same files in the same workers.
+    """
+    rng = random.Random(seed)
+    files = [(f"roll_{idx}.{file_format}", random_roll_file(rng, rows, pool_size=rows * 2, file_type=file_format))
+             for idx in range(sessions)]
+
+    options = {'reruns': reruns, 'analytics': analytics, 'timeout': timeout}
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=sessions, initializer=_init_worker) as pool:
+        barrier = manager.Barrier(sessions)
+        list(pool.map(partial(_warm_up, barrier, analytics=analytics, timeout=timeout), [files[0]] * sessions))
+
+        start = time.perf_counter()
+        results = list(pool.map(partial(_timed_session, **options), files))
+        elapsed = time.perf_counter() - start
+        latencies = [latency for result in results for latency in result['latencies']]
+        errors = [error for result in results for error in result['errors']]
+
+        if trace_memory:
+            memory = list(pool.map(partial(_traced_session, **options), files))
+
+    summary = {
+        'sessions': sessions,
+        'reruns_per_session': reruns,
+        'rows_per_file': rows,
+        'format': file_format,
+        'analytics': analytics,
+        'completed_reruns': len(latencies),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'wall_time_s': elapsed,
+        'throughput_reruns_per_s': len(latencies) / elapsed if elapsed else float('nan'),
+        'latency_p50_s': _percentile(latencies, 50),
+        'latency_p95_s': _percentile(latencies, 95),
+        'latency_max_s': max(latencies) if latencies else float('nan'),
+        'latency_mean_s': statistics.fmean(latencies) if latencies else float('nan'),
+    }
+    if trace_memory:
+        summary['memory_growth_per_session_bytes'] = statistics.fmean(retained for retained, _ in memory)
+        summary['memory_peak_bytes'] = max(peak for _, peak in memory)
+    return summary
+
+def format_report(summary: Dict) -> str:
+    lines = [
+        f"Sessions: {summary['sessions']} x {summary['reruns_per_session']} reruns "
+        f"({summary['rows_per_file']} rows, {summary['format']}, analytics {'on' if summary['analytics'] else 'off'})",
+        f"Completed reruns: {summary['completed_reruns']}  Errors: {summary['errors']}",
+        f"Latency p50: {summary['latency_p50_s'] * 1000:.0f} ms  p95: {summary['latency_p95_s'] * 1000:.0f} ms  "
+        f"max: {summary['latency_max_s'] * 1000:.0f} ms",
+        f"Throughput: {summary['throughput_reruns_per_s']:.2f} reruns/s over {summary['wall_time_s']:.1f} s",
+    ]
+    if 'memory_growth_per_session_bytes' in summary:
+        lines.append(
+            f"Memory growth per session: {summary['memory_growth_per_session_bytes'] / 1024:.0f} KiB  "
+            f"Peak per session: {summary['memory_peak_bytes'] / 2**20:.1f} MiB"
+        )
+    for error in summary['error_samples']:
+        lines.append(f"  Error: {error}")
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the AAFC Electronic Rolls app")
+    parser.add_argument('--sessions', type=int, default=10, help="Concurrent sessions (default 10)")
+    parser.add_argument('--reruns', type=int, default=3, help="Script reruns per session (default 3)")
+    parser.add_argument('--rows', type=int, default=40, help="Form submissions per generated roll (default 40)")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'arrow'], default='csv', help="Upload file format")
+    parser.add_argument('--analytics', action='store_true', help="Tick submission time analytics on the second rerun")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced memory pass")
+    parser.add_argument('--timeout', type=float, default=60, help="Seconds before a rerun counts as failed")
+    parser.add_argument('--seed', type=int, default=215, help="Random seed for generated rolls")
+    parser.add_argument('--json', help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+
+    summary = run_load_test(
+        sessions=args.sessions, reruns=args.reruns, rows=args.rows, file_format=args.format,
+        analytics=args.analytics, trace_memory=not args.no_memory, timeout=args.timeout, seed=args.seed
+    )
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    # AppTest runs app.py as __main__ in the workers, so the functions sent to
+    # them must come from the importable module, not this script
+    from load_test import main
+    main()
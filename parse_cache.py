@@ -0,0 +1,157 @@
+"""
+Persistent cache of parsed names, shared between sessions and processes.
+
+The same members appear on every roll, so parsed fields are stored in a
+local SQLite database keyed by the raw name string and a signature of the
+rank tables that produced them. Entries written under a different signature
+are never returned, so editing the rank tables invalidates the cache; they
+stop being used and are the first to go when the least recently used entries
+are evicted once the cache grows past max_entries. Processes running with
+different rank tables (e.g. during a deploy) can share one database.
+
+Lookups don't write: an entry's last_used time is only refreshed once it is
+older than REFRESH_SECONDS, in one batched statement. The busy timeout is
+short, so a database locked by another writer behaves as a cache miss
+rather than holding up the roll.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable
+
+FIELDS = ['rank', 'surname', 'firstname', 'original']
+
+# Keep well under SQLite's host parameter limit
+_CHUNK_SIZE = 500
+
+# Seconds to wait for another connection's lock before giving up
+BUSY_TIMEOUT = 0.05
+
+# last_used is refreshed on lookup at most this often per entry
+REFRESH_SECONDS = 24 * 60 * 60
+
+class ParseCache:
+    """SQLite-backed map of raw name string -> parsed name fields."""
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        """
+        Open (or create) the cache at path.
+        Raises sqlite3.Error if the database can't be opened.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # WAL lets readers in other processes carry on while one process writes.
+        # Setup may wait for another process; lookups and writes afterwards don't.
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed ("
+                "signature TEXT NOT NULL, name TEXT NOT NULL, "
+                "rank TEXT, surname TEXT, firstname TEXT, original TEXT, "
+                "last_used REAL NOT NULL, PRIMARY KEY (signature, name))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS parsed_last_used ON parsed (last_used)")
+        self._conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+
+    def get_many(self, names: Iterable[str], signature: str) -> Dict[str, Dict]:
+        """
+        Look up parsed fields for names. Returns {name: fields} for the names
+        found; missing names are left for the caller to parse and put_many.
+        """
+        names = list(dict.fromkeys(names))
+        found = {}
+        stale = []
+        refresh_before = time.time() - REFRESH_SECONDS
+        try:
+            with self._lock:
+                for start in range(0, len(names), _CHUNK_SIZE):
+                    chunk = names[start:start + _CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT name, rank, surname, firstname, original, last_used FROM parsed "
+                        f"WHERE signature = ? AND name IN ({placeholders})",
+                        [signature] + chunk
+                    ).fetchall()
+                    for name, rank, surname, firstname, original, last_used in rows:
+                        found[name] = {'rank': rank, 'surname': surname, 'firstname': firstname, 'original': original}
+                        if last_used < refresh_before:
+                            stale.append(name)
+        except sqlite3.OperationalError:
+            # Locked or unavailable - behave as a miss rather than fail the roll
+            found = {}
+            stale = []
+        if stale:
+            self._refresh(stale, signature)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(names) - len(found)
+        return found
+
+    def put_many(self, parsed: Dict[str, Dict], signature: str) -> None:
+        """Store parsed fields ({name: fields}) and evict the oldest entries if over size."""
+        if not parsed:
+            return
+        now = time.time()
+        rows = [(signature, name, *(fields[field] for field in FIELDS), now)
+                for name, fields in parsed.items()]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO parsed "
+                    "(signature, name, rank, surname, firstname, original, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._evict()
+        except sqlite3.OperationalError:
+            pass  # Caching is best effort
+
+    def _refresh(self, names: list, signature: str) -> None:
+        """Mark entries as used now, in one statement per chunk; skipped if the database is busy."""
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                for start in range(0, len(names), _CHUNK_SIZE):
+                    chunk = names[start:start + _CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    self._conn.execute(
+                        f"UPDATE parsed SET last_used = ? WHERE signature = ? AND name IN ({placeholders})",
+                        [now, signature] + chunk
+                    )
+        except sqlite3.OperationalError:
+            pass  # Eviction order is best effort
+
+    def _evict(self) -> None:
+        """Trim to 90% of max_entries, dropping the least recently used first."""
+        count = self._conn.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM parsed WHERE rowid IN "
+            "(SELECT rowid FROM parsed ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parsed").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM parsed")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,225 @@
+"""
+Bulk generation of printable parade-night roll reports.
+
+Processes many roll files in a worker pool and renders each one as a
+print-ready HTML page with the same Staff -> Executives -> Flights grouping
+and statistics tiles as the app, then bundles the pages (and an index) into
+a single zip archive. Open a page in a browser and print, or "Save as PDF".
+
+Usage:
+    python roll_reports.py rolls/*.xlsx -o "Term 1 Rolls.zip"
+    python roll_reports.py rolls/ --workers 4 -o reports.zip
+
+Parquet and Arrow rolls (see convert_rolls.py) are memory-mapped and only
+their attendance columns are read, which is much faster than re-reading .xlsx.
+"""
+import argparse
+import html
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from app import (
+    process_rolls_data,
+    prevalidate_upload,
+    read_roll_file,
+    find_roll_files,
+    RESOURCES,
+    COLUMN_ORDER,
+    ROLL_FILE_TYPES
+)
+
+# Templates are compiled once per worker process and reused for every page
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+  @page { size: A4; margin: 12mm; }
+  body { font-family: Arial, Helvetica, sans-serif; font-size: 10pt; color: #000; }
+  h1 { font-size: 16pt; margin: 0 0 4mm; }
+  h2 { font-size: 12pt; margin: 6mm 0 2mm; border-bottom: 1px solid #000; break-after: avoid; }
+  h3 { font-size: 10.5pt; margin: 3mm 0 1mm; break-after: avoid; }
+  .tiles { display: flex; flex-wrap: wrap; gap: 3mm; margin-bottom: 4mm; }
+  .tile { border: 1px solid #000; padding: 2mm 4mm; min-width: 28mm; }
+  .tile .label { font-size: 8pt; }
+  .tile .value { font-size: 14pt; font-weight: bold; }
+  table { border-collapse: collapse; width: 100%; margin-bottom: 2mm; }
+  th, td { border: 1px solid #999; padding: 1mm 2mm; text-align: left; }
+  th { background: #eee; }
+  td.tick { width: 12mm; }
+  tr { break-inside: avoid; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<div class="tiles">$tiles</div>
+$groups
+</body>
+</html>
+""")
+
+TILE_TEMPLATE = Template('<div class="tile"><div class="label">$label</div><div class="value">$value</div></div>')
+
+GROUP_TEMPLATE = Template('<h2>$heading ($count)</h2>\n$sections')
+
+SECTION_TEMPLATE = Template("""$heading<table>
+<thead><tr><th>Rank</th><th>Surname</th><th>First Name</th><th>Sign</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>""")
+
+ROW_TEMPLATE = Template('<tr><td>$rank</td><td>$surname</td><td>$firstname</td><td class="tick"></td></tr>')
+
+INDEX_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Roll Reports</title>
+<style>body { font-family: Arial, Helvetica, sans-serif; } td, th { padding: 1mm 3mm; text-align: left; }</style>
+</head>
+<body>
+<h1>Roll Reports</h1>
+<table>
+<thead><tr><th>Roll</th><th>Total</th><th>Staff</th><th>Cadets</th><th>Unknown Rank</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>
+</body>
+</html>
+""")
+
+INDEX_ROW_TEMPLATE = Template(
+    '<tr><td><a href="$href">$title</a></td><td>$total</td><td>$staff</td><td>$cadets</td><td>$unknown</td></tr>'
+)
+
+def _render_rows(rows: pd.DataFrame) -> str:
+    return '\n'.join(
+        ROW_TEMPLATE.substitute(
+            rank=html.escape(str(rank)), surname=html.escape(str(surname)), firstname=html.escape(str(firstname))
+        )
+        for rank, surname, firstname in rows[['Rank', 'Surname', 'First Name']].itertuples(index=False, name=None)
+    )
+
+def render_roll_report(title: str, output_df: pd.DataFrame, stats: Dict) -> str:
+    """
+    Render one processed roll as a print-ready HTML page.
+    Staff, then Executives & Seniors, then each flight by section, keeping
+    the rank order from process_rolls_data.
+    """
+    tiles = [
+        ("Total Personnel", stats['total_count']),
+        ("Staff", stats['staff_count']),
+        ("Cadets", stats['cadet_count']),
+        ("Executives & Seniors", stats.get('exec_count', 0)),
+        ("Flight 1", stats['flight1_count']),
+        ("Flight 2", stats['flight2_count']),
+        ("Not Listed", stats.get('not_listed_count', 0)),
+    ]
+    tiles_html = ''.join(TILE_TEMPLATE.substitute(label=html.escape(label), value=value) for label, value in tiles)
+
+    # Group sections in roll order: Staff -> Executives -> Flights -> Not Listed
+    groups = output_df['Source Column'].map(RESOURCES.section_groups).fillna(output_df['Source Column'])
+    group_headings = {"Executive and Seniors": "Executives & Seniors"}
+    sections_present = set(output_df['Source Column'])
+    sections_in_order = [col for col in COLUMN_ORDER if col in sections_present]
+    sections_in_order += [col for col in output_df['Source Column'].unique() if col not in sections_in_order]
+
+    groups_html = []
+    for group in dict.fromkeys(RESOURCES.section_groups.get(section, section) for section in sections_in_order):
+        in_group = output_df[groups == group]
+        group_sections = set(in_group['Source Column'])
+        sections = [section for section in sections_in_order if section in group_sections]
+        sections_html = '\n'.join(
+            SECTION_TEMPLATE.substitute(
+                heading=f'<h3>{html.escape(section)}</h3>\n' if len(sections) > 1 else '',
+                rows=_render_rows(in_group[in_group['Source Column'] == section])
+            )
+            for section in sections
+        )
+        groups_html.append(GROUP_TEMPLATE.substitute(
+            heading=html.escape(group_headings.get(group, group)), count=len(in_group), sections=sections_html
+        ))
+
+    return PAGE_TEMPLATE.substitute(title=html.escape(title), tiles=tiles_html, groups='\n'.join(groups_html))
+
+def build_report(path: str, consistent_totals: bool = False) -> Tuple[str, str, Dict]:
+    """
+    Process one roll file and render its report (run in a worker process).
+    consistent_totals is passed through to process_rolls_data.
+    Returns (page file name, page HTML, summary counts).
+    """
+    title = os.path.splitext(os.path.basename(path))[0]
+    file_type = os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, 'rb') as f:
+        prevalidate_upload(f, file_type)
+        df, _ = read_roll_file(f, file_type)
+    output_df, stats = process_rolls_data(df, consistent_totals=consistent_totals)
+    summary = {
+        'title': title,
+        'total': stats['total_count'],
+        'staff': stats['staff_count'],
+        'cadets': stats['cadet_count'],
+        'unknown': stats['unknown_count'],
+    }
+    return f"{title}.html", render_roll_report(title, output_df, stats), summary
+
+def generate_reports(paths: List[str], archive_path: str, workers: int = None,
+                     consistent_totals: bool = False) -> List[Dict]:
+    """
+    Render a report for each roll file in a process pool and write them, plus
+    index.html, to one zip archive. Files that fail are listed in the index
+    with their error instead of stopping the batch. Returns the summaries.
+    """
+    summaries = []
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        futures = [(path, pool.submit(build_report, path, consistent_totals)) for path in paths]
+        for path, future in futures:
+            try:
+                page_name, page_html, summary = future.result()
+            except Exception as e:
+                title = os.path.basename(path)
+                summaries.append({'title': title, 'error': str(e)})
+                continue
+            if page_name in archive.namelist():
+                page_name = f"{os.path.basename(path)}.html"  # Same roll in two formats
+            archive.writestr(page_name, page_html)
+            summaries.append({**summary, 'href': page_name})
+
+        index_rows = '\n'.join(
+            INDEX_ROW_TEMPLATE.substitute(
+                href=html.escape(summary['href'], quote=True), title=html.escape(summary['title']),
+                total=summary['total'], staff=summary['staff'], cadets=summary['cadets'], unknown=summary['unknown']
+            ) if 'error' not in summary else
+            f"<tr><td>{html.escape(summary['title'])}</td><td colspan=\"4\">Error: {html.escape(summary['error'])}</td></tr>"
+            for summary in summaries
+        )
+        archive.writestr('index.html', INDEX_TEMPLATE.substitute(rows=index_rows))
+    return summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Render printable roll reports for many roll files into one zip archive")
+    parser.add_argument('inputs', nargs='+', help="Roll files, directories or glob patterns")
+    parser.add_argument('-o', '--output', default='Roll Reports.zip', help="Archive to write (default 'Roll Reports.zip')")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--consistent-totals', action='store_true',
+                        help="Count cadets ticked in several sections only in the first")
+    args = parser.parse_args()
+
+    paths = find_roll_files(args.inputs)
+    if not paths:
+        parser.error(f"No roll files ({', '.join('.' + file_type for file_type in ROLL_FILE_TYPES)}) found")
+    summaries = generate_reports(paths, args.output, args.workers, args.consistent_totals)
+    failed = [summary for summary in summaries if 'error' in summary]
+    print(f"Wrote {len(summaries) - len(failed)} report(s) to {args.output}")
+    for summary in failed:
+        print(f"  Failed: {summary['title']}: {summary['error']}")
+
+if __name__ == "__main__":
+    main()
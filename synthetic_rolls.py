@@ -0,0 +1,128 @@
+"""
+Synthetic AAFC roll data for tests, equivalence checks and load testing.
+
+Generates name strings and roll DataFrames shaped like the Microsoft Forms
+export, deliberately including the awkward cases seen in real rolls:
+variant rank spellings, missing ranks, unbalanced brackets, stray
+whitespace, 'Late' tokens, comma-separated "Not Listed" entries and the
+same person ticked under several sections.
+"""
+import io
+import random
+from typing import List, Optional
+
+import pandas as pd
+
+from app import CADET_RANKS, STAFF_RANKS, RANK_ALIASES, COLUMN_ORDER, COLUMNAR_TYPES, write_columnar_roll
+
+SURNAMES = [
+    "Smith", "Jones", "Evans", "Vincent", "Boer", "Hartley", "Bowie", "Nguyen",
+    "O'Brien", "Smith-Jones", "McDonald", "Van Der Berg", "Li", "Ng", "Offord",
+    "Cadet", "Sergeant", "Wo", "Ac", "Zoë"
+]
+FIRSTNAMES = ["John", "Mary Anne", "Zoe", "Alice", "Tom", "Jo", "Lee", ""]
+
+# Spellings that resolve to each canonical rank
+_SPELLINGS = {rank: [rank] for rank in STAFF_RANKS + CADET_RANKS[:-1]}
+for _alias, _rank in RANK_ALIASES.items():
+    _SPELLINGS[_rank].append(_alias)
+
+def random_rank(rng: random.Random, staff: Optional[bool] = None) -> str:
+    """Return a rank written the way a person might type it."""
+    if staff is None:
+        staff = rng.random() < 0.3
+    rank = rng.choice(STAFF_RANKS if staff else CADET_RANKS[:-1])
+    spelling = rng.choice(_SPELLINGS[rank])
+    spelling = spelling.replace(' ', rng.choice([' ', '-', '.', '']))
+    case = rng.random()
+    if case < 0.2:
+        spelling = spelling.title()
+    elif case < 0.3:
+        spelling = spelling.lower()
+    suffix = rng.choice(['', '', '', '.', '(AAFC)', '(AAFC)-', ' (AAFC)'])
+    return spelling + suffix
+
+def random_name(rng: random.Random, staff: Optional[bool] = None) -> str:
+    """Return a single name string in one of the formats found on rolls."""
+    rank = random_rank(rng, staff)
+    surname = rng.choice(SURNAMES)
+    firstname = rng.choice(FIRSTNAMES)
+    form = rng.randrange(14)
+    if form == 0:
+        return f"{rank} {surname}"
+    if form == 1:
+        return f"{rank} {firstname} {surname}".replace('  ', ' ')
+    if form == 2:
+        return surname
+    if form == 3:
+        return f"{surname} ({firstname})"
+    if form == 4:
+        return f"XYZ {surname}"
+    if form == 5:
+        return rank
+    if form == 6:
+        return f"  {rank}   {surname}  ({firstname})  "
+    if form == 7:
+        return f"{rank} {surname} ({firstname}"
+    if form == 8:
+        return f"{rank} {surname} ({firstname}) ({rng.choice(FIRSTNAMES)})"
+    if form == 9:
+        return f"{rank} {surname}, {random_rank(rng)} {rng.choice(SURNAMES)}"
+    if form == 10:
+        return rng.choice(["Late", "late", "LATE", " Late "])
+    if form == 11:
+        return f"{surname.lower()} {firstname.lower()}"
+    return f"{rank} {surname} ({firstname})"
+
+def random_cell(rng: random.Random, pool: List[str]):
+    """Return a cell value: missing, blank, numeric or semicolon-joined names."""
+    kind = rng.random()
+    if kind < 0.35:
+        return None
+    if kind < 0.40:
+        return rng.choice(['', ' ', ';', ' ; '])
+    if kind < 0.42:
+        return rng.choice([1, 2.5, 0])
+    names = rng.sample(pool, k=min(len(pool), rng.randint(1, 4)))
+    return rng.choice([';', '; ', ' ; ']).join(names)
+
+def random_roll_df(rng: random.Random, n_rows: int = 10, pool_size: int = 40) -> pd.DataFrame:
+    """
+    Return a roll DataFrame with the attendance columns (Staff .. Not Listed).
+    Names are drawn from a shared pool, so the same person regularly appears
+    in several rows and under several sections.
+    """
+    pool = [random_name(rng) for _ in range(pool_size)]
+    rows = [[random_cell(rng, pool) for _ in COLUMN_ORDER] for _ in range(n_rows)]
+    return pd.DataFrame(rows, columns=[f"Column {idx}" for idx in range(8, 8 + len(COLUMN_ORDER))])
+
+
+def random_roll_file(rng: random.Random, n_rows: int = 10, pool_size: int = 40, file_type: str = 'csv') -> bytes:
+    """
+    Return a roll file (CSV, xlsx, parquet or arrow bytes) in the full Forms
+    export layout: eight submission columns followed by the attendance columns.
+    """
+    attendance = random_roll_df(rng, n_rows, pool_size)
+    attendance.columns = COLUMN_ORDER
+    parade_start = pd.Timestamp("2024-02-06 18:30")
+    completed = sorted(parade_start + pd.Timedelta(seconds=rng.randint(-900, 3600)) for _ in range(n_rows))
+    submission = pd.DataFrame({
+        "ID": range(1, n_rows + 1),
+        "Start time": [time - pd.Timedelta(seconds=rng.randint(20, 300)) for time in completed],
+        "Completion time": completed,
+        "Email": "anonymous",
+        "Name": "",
+        "Last modified time": "",
+        "Parade Date": parade_start.normalize(),
+        "Squadron": "215SQN",
+    })
+    roll = pd.concat([submission, attendance], axis=1)
+    
+    buffer = io.BytesIO()
+    if file_type == 'csv':
+        roll.to_csv(buffer, index=False)
+    elif file_type in COLUMNAR_TYPES:
+        write_columnar_roll(roll, buffer, file_type)
+    else:
+        roll.to_excel(buffer, index=False)
+    return buffer.getvalue()
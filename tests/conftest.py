@@ -35,3 +35,16 @@ def sample_names():
         'cadet_high_rank': "CUO Evans",
         'cadet_low_rank': "CDT Vincent"
     }
+
+@pytest.fixture
+def sample_roll_df():
+    """Fixture providing a small roll with one row per form submission (attendance columns only)"""
+    rows = [
+        ["FLTLT Johnson; CPL Smith (Mary)", "CUO Evans", None, "CDT Vincent", None, None, None,
+         None, "LCDT Boer (Zoe)", None, None, None, None],
+        ["SGT Smith (John)", "CWOFF Hartley", None, "Late; CDT Adams", None, None, None,
+         None, None, "CDT Brown", None, None, "Jones, CDT Green"],
+        [None, None, None, "CDT Vincent", None, None, None,
+         None, "CDT Adams", None, None, None, None],
+    ]
+    return pd.DataFrame(rows, columns=[f"Column {idx}" for idx in range(8, 21)])
@@ -0,0 +1,89 @@
+import pytest
+import io
+import random
+import pandas as pd
+import app
+from app import prevalidate_upload, read_roll_file, process_rolls_data, find_roll_files, UploadValidationError
+from convert_rolls import convert_archive, SOURCE_TYPES
+from synthetic_rolls import random_roll_file
+
+@pytest.fixture(params=['parquet', 'arrow'])
+def columnar_type(request):
+    return request.param
+
+class TestColumnarRollFiles:
+    """Tests for reading Parquet and Arrow IPC roll files"""
+
+    def test_matches_csv(self, columnar_type):
+        """Test a columnar roll gives the same roll and statistics as the CSV"""
+        columnar = random_roll_file(random.Random(38), n_rows=30, file_type=columnar_type)
+        csv = random_roll_file(random.Random(38), n_rows=30)
+        df, _ = read_roll_file(io.BytesIO(columnar), columnar_type)
+        expected_df, _ = read_roll_file(io.BytesIO(csv), 'csv')
+        assert list(df.columns) == list(expected_df.columns)
+
+        output_df, stats = process_rolls_data(df)
+        expected_output, expected_stats = process_rolls_data(expected_df)
+        assert output_df.equals(expected_output)
+        assert stats['section_counts'] == expected_stats['section_counts']
+
+    def test_timestamps(self, columnar_type):
+        """Test the submission columns are returned with their datetimes"""
+        data = random_roll_file(random.Random(38), n_rows=10, file_type=columnar_type)
+        df, submission_df = read_roll_file(io.BytesIO(data), columnar_type, include_timestamps=True)
+        assert df.shape == (10, 13)
+        assert pd.api.types.is_datetime64_any_dtype(submission_df['Completion time'])
+
+    def test_reads_path(self, columnar_type, tmp_path):
+        """Test a file on disk is read from a path or an open file"""
+        path = tmp_path / f"roll.{columnar_type}"
+        path.write_bytes(random_roll_file(random.Random(38), n_rows=12, file_type=columnar_type))
+        assert read_roll_file(str(path), columnar_type)[0].shape == (12, 13)
+        with open(path, 'rb') as f:
+            assert prevalidate_upload(f, columnar_type)['rows'] == 12
+            assert read_roll_file(f, columnar_type)[0].shape == (12, 13)
+
+    def test_prevalidate(self, columnar_type):
+        """Test rows and columns come from the file metadata"""
+        data = random_roll_file(random.Random(38), n_rows=25, file_type=columnar_type)
+        result = prevalidate_upload(io.BytesIO(data), columnar_type)
+        assert result['rows'] == 25
+        assert result['columns'] == 21
+        assert result['header'][8] == "Staff"
+
+    def test_row_limit(self, columnar_type, monkeypatch):
+        """Test the row limit applies to columnar files"""
+        monkeypatch.setattr(app, 'MAX_UPLOAD_ROWS', 10)
+        data = random_roll_file(random.Random(38), n_rows=25, file_type=columnar_type)
+        with pytest.raises(UploadValidationError, match="25 rows"):
+            prevalidate_upload(io.BytesIO(data), columnar_type)
+
+    def test_invalid_file(self, columnar_type):
+        """Test a file that isn't Parquet/Arrow is rejected"""
+        with pytest.raises(UploadValidationError, match="Not a valid"):
+            prevalidate_upload(io.BytesIO(b"Staff,Executive and Seniors\n" * 10), columnar_type)
+
+class TestConvertRolls:
+    """Tests for the archive converter"""
+
+    def test_convert_archive(self, columnar_type, tmp_path):
+        """Test files are converted once, kept whole, and skipped when up to date"""
+        source = tmp_path / "week1.xlsx"
+        source.write_bytes(random_roll_file(random.Random(38), n_rows=15, file_type='xlsx'))
+        (tmp_path / "broken.csv").write_bytes(b"")
+        paths = find_roll_files([str(tmp_path)], SOURCE_TYPES)
+        output_dir = tmp_path / "converted"
+
+        results = convert_archive(paths, columnar_type, str(output_dir))
+        assert {result['status'] for result in results} == {'converted', 'failed'}
+        target = output_dir / f"week1.{columnar_type}"
+        assert prevalidate_upload(io.BytesIO(target.read_bytes()), columnar_type)['columns'] == 21
+
+        df, _ = read_roll_file(str(target), columnar_type)
+        expected_df, _ = read_roll_file(str(source), 'xlsx')
+        assert process_rolls_data(df)[0].equals(process_rolls_data(expected_df)[0])
+
+        results = convert_archive(paths, columnar_type, str(output_dir))
+        assert [result['status'] for result in results if result['source'] == str(source)] == ['skipped']
+        results = convert_archive(paths, columnar_type, str(output_dir), force=True)
+        assert [result['status'] for result in results if result['source'] == str(source)] == ['converted']
@@ -0,0 +1,187 @@
+"""
+Differential tests: the vectorised processing path against a row-by-row
+reference implementation, over randomly generated rolls and names.
+
+The quick tests run a few hundred cases; the tests marked slow run the same
+checks at scale (pytest -m slow). EQUIVALENCE_SEED and EQUIVALENCE_SCALE
+can be set to replay a failure or run more cases.
+"""
+import os
+import random
+import pytest
+import pandas as pd
+from app import (
+    parse_name,
+    parse_names,
+    get_rank_priority,
+    extract_names_from_row,
+    extract_name_table,
+    process_rolls_data,
+    COLUMN_ORDER,
+    FLIGHT1_COLUMNS,
+    FLIGHT2_COLUMNS
+)
+from synthetic_rolls import random_name, random_roll_df
+
+SEED = int(os.environ.get('EQUIVALENCE_SEED', '215'))
+SCALE = int(os.environ.get('EQUIVALENCE_SCALE', '1'))
+
+def reference_process_rolls_data(df: pd.DataFrame):
+    """Row-by-row processing using the scalar helpers (the original algorithm)"""
+    df.columns.values[:min(len(df.columns), len(COLUMN_ORDER))] = COLUMN_ORDER[:len(df.columns)]
+    if "Not Listed" in df.columns:
+        df["Not Listed"] = df["Not Listed"].apply(
+            lambda x: str(x).replace(',', ';') if pd.notna(x) else x
+        )
+    
+    all_names = []
+    for _, row in df.iterrows():
+        all_names.extend(extract_names_from_row(row, 0, len(row) - 1))
+    
+    unique_names = {}
+    section_counts = {}
+    for name, source_col in all_names:
+        unique_names.setdefault(name, source_col)
+        section_counts.setdefault(source_col, set()).add(name)
+    section_counts = {k: len(v) for k, v in section_counts.items()}
+    
+    groups = {"Staff": [], "Executive and Seniors": [], None: []}
+    for name, source_col in unique_names.items():
+        parsed = parse_name(name)
+        parsed['source_column'] = source_col
+        groups[source_col if source_col in groups else None].append(parsed)
+    groups["Staff"].sort(key=lambda x: (get_rank_priority(x['rank'], True), x['surname']))
+    for key in ("Executive and Seniors", None):
+        groups[key].sort(key=lambda x: (get_rank_priority(x['rank'], False), x['surname']))
+    sorted_names = groups["Staff"] + groups["Executive and Seniors"] + groups[None]
+    
+    rows = [(p['rank'], p['surname'], p['firstname'] or '', p['original'], p['source_column'])
+            for p in sorted_names]
+    statistics = {
+        'staff_count': len(groups["Staff"]),
+        'cadet_count': len(sorted_names) - len(groups["Staff"]),
+        'total_count': len(sorted_names),
+        'section_counts': section_counts,
+        'flight1_count': sum(section_counts.get(col, 0) for col in FLIGHT1_COLUMNS),
+        'flight2_count': sum(section_counts.get(col, 0) for col in FLIGHT2_COLUMNS),
+        'exec_count': len(groups["Executive and Seniors"]),
+        'not_listed_count': section_counts.get("Not Listed", 0),
+        'unknown_count': sum(1 for p in sorted_names if p['rank'] == 'UNKNOWN')
+    }
+    return rows, statistics
+
+def assert_rolls_equivalent(df: pd.DataFrame):
+    """Run both implementations on copies of df and compare field by field"""
+    expected_rows, expected_stats = reference_process_rolls_data(df.copy())
+    output_df, stats = process_rolls_data(df.copy())
+    
+    actual_rows = list(output_df.itertuples(index=False, name=None))
+    assert len(actual_rows) == len(expected_rows)
+    for position, (actual, expected) in enumerate(zip(actual_rows, expected_rows)):
+        assert actual == expected, f"Row {position} differs"
+    for key, value in expected_stats.items():
+        assert stats[key] == value, f"Statistic '{key}' differs"
+
+class TestParseEquivalence:
+    """parse_names against parse_name"""
+    
+    def check(self, names):
+        result = parse_names(pd.Series(names, dtype=object))
+        for idx, name in enumerate(names):
+            assert result.iloc[idx].to_dict() == parse_name(name), repr(name)
+    
+    def test_random_names(self):
+        """Test generated names, including the tricky formats"""
+        rng = random.Random(SEED)
+        self.check([random_name(rng) for _ in range(500 * SCALE)])
+        
+    def test_edge_cases(self):
+        """Test hand-picked inputs around brackets, whitespace and rank boundaries"""
+        self.check([
+            "", " ", "SGT", "SGT ", "(John)", "SGT (John)", "SGT Smith ()", "Smith (John",
+            "Smith John)", "a (b) c (d)", "X(y)z)", "CPL(AAFC)Smith", "CPL(AAFC) Smith",
+            "CPL (AAFC) Smith", "W Offord", "AC Wilson", "ACW Wilson", "Flt Lt", "cdt x",
+            "SGT\tSmith", "UNKNOWN Smith", "Late"
+        ])
+        
+    @pytest.mark.slow
+    def test_random_names_at_scale(self):
+        """Test many generated names in one Series"""
+        rng = random.Random(SEED + 1)
+        self.check([random_name(rng) for _ in range(20000 * SCALE)])
+
+class TestExtractionEquivalence:
+    """extract_name_table against extract_names_from_row"""
+    
+    def test_random_rolls(self):
+        """Test generated rolls produce the same names, sources and order"""
+        rng = random.Random(SEED)
+        for _ in range(50 * SCALE):
+            df = random_roll_df(rng, n_rows=rng.randint(0, 15))
+            expected = []
+            for _, row in df.iterrows():
+                expected.extend(extract_names_from_row(row, 0, len(row) - 1))
+            table = extract_name_table(df)
+            assert list(zip(table['Name'], table['Source Column'])) == expected
+
+class TestProcessingEquivalence:
+    """process_rolls_data against the row-by-row reference"""
+    
+    def test_random_rolls(self):
+        """Test generated rolls give identical output and statistics"""
+        rng = random.Random(SEED)
+        for _ in range(50 * SCALE):
+            assert_rolls_equivalent(random_roll_df(rng, n_rows=rng.randint(0, 15)))
+            
+    def test_narrow_roll(self):
+        """Test a roll with fewer columns than COLUMN_ORDER"""
+        rng = random.Random(SEED)
+        assert_rolls_equivalent(random_roll_df(rng, n_rows=8).iloc[:, :5])
+        
+    def test_first_source_wins(self):
+        """Test a name in several sections keeps the first section it appeared in"""
+        df = random_roll_df(random.Random(SEED), n_rows=0)
+        df.loc[0] = [None] * len(COLUMN_ORDER)
+        df.iloc[0, 3] = "CDT Adams"
+        df.iloc[0, 8] = "CDT Adams; Late"
+        df.loc[1] = [None] * len(COLUMN_ORDER)
+        df.iloc[1, 12] = "CDT Adams, Jones"
+        assert_rolls_equivalent(df)
+        
+    def test_section_conflicts(self):
+        """Test the conflict report and consistent totals against every section each name appeared in"""
+        rng = random.Random(SEED)
+        for _ in range(50 * SCALE):
+            df = random_roll_df(rng, n_rows=rng.randint(0, 15))
+            reference = df.copy()
+            reference.columns.values[:] = COLUMN_ORDER
+            reference["Not Listed"] = reference["Not Listed"].apply(
+                lambda x: str(x).replace(',', ';') if pd.notna(x) else x
+            )
+            sections = {}
+            for _, row in reference.iterrows():
+                for name, source_col in extract_names_from_row(row, 0, len(row) - 1):
+                    sections.setdefault(name, [])
+                    if source_col not in sections[name]:
+                        sections[name].append(source_col)
+            expected = {name: cols for name, cols in sections.items() if len(cols) > 1}
+            
+            output_df, stats = process_rolls_data(df, consistent_totals=True)
+            conflicts = stats['conflicts']
+            actual = {name: [kept] + (others.split('; ') if others else [])
+                      for name, kept, others in conflicts.itertuples(index=False, name=None)}
+            assert actual == expected
+            
+            first_source = {name: cols[0] for name, cols in sections.items()}
+            for col in COLUMN_ORDER:
+                expected_count = sum(source == col for source in first_source.values())
+                assert stats['section_counts'].get(col, 0) == expected_count, col
+            cadet_sections = sum(count for col, count in stats['section_counts'].items() if col != "Staff")
+            assert cadet_sections == stats['cadet_count']
+        
+    @pytest.mark.slow
+    def test_random_rolls_at_scale(self):
+        """Test large generated rolls"""
+        rng = random.Random(SEED + 1)
+        for _ in range(20 * SCALE):
+            assert_rolls_equivalent(random_roll_df(rng, n_rows=rng.randint(100, 400), pool_size=300))
@@ -0,0 +1,32 @@
+import pytest
+import random
+import threading
+import streamlit as st
+import load_test
+from load_test import run_load_test, run_session, format_report
+from synthetic_rolls import random_roll_file
+
+@pytest.mark.integration
+@pytest.mark.slow
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+class TestLoadTest:
+    """Smoke test for the concurrent-session load test harness"""
+    
+    def test_small_run(self):
+        """Test a small run completes every rerun without errors and reports latency"""
+        summary = run_load_test(sessions=2, reruns=2, rows=10, analytics=True, trace_memory=True)
+        assert summary['errors'] == 0, summary['error_samples']
+        assert summary['completed_reruns'] == 4
+        assert 0 < summary['latency_p50_s'] <= summary['latency_p95_s']
+        assert 'memory_growth_per_session_bytes' in summary
+        assert "Latency p50" in format_report(summary)
+        
+    def test_thread_exception_is_error(self, monkeypatch):
+        """Test an exception escaping a thread during a session counts as an error"""
+        monkeypatch.setattr(st, 'file_uploader', load_test._file_uploader)
+        monkeypatch.setattr(threading, 'excepthook', load_test._record_thread_exception)
+        thread = threading.Thread(target=lambda: 1 / 0)
+        thread.start()
+        thread.join()
+        result = run_session("roll.csv", random_roll_file(random.Random(32), n_rows=5), reruns=1, analytics=False, timeout=60)
+        assert result['errors'] == ["ZeroDivisionError: division by zero"]
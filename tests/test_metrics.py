@@ -0,0 +1,74 @@
+import pytest
+import urllib.request
+import app
+import metrics
+from app import process_rolls_data
+from metrics import Registry
+
+class TestRegistry:
+    """Tests for metric recording and Prometheus text rendering"""
+    
+    def test_counter_with_labels(self):
+        """Test counters accumulate separately per label set"""
+        registry = Registry()
+        counter = registry.counter('test_lookups_total', "Lookups")
+        counter.inc(3, result='hit')
+        counter.inc(result='miss')
+        counter.inc(result='hit')
+        text = registry.render()
+        assert '# TYPE test_lookups_total counter' in text
+        assert 'test_lookups_total{result="hit"} 4' in text
+        assert 'test_lookups_total{result="miss"} 1' in text
+        
+    def test_histogram_buckets(self):
+        """Test histogram buckets are cumulative with sum and count"""
+        registry = Registry()
+        histogram = registry.histogram('test_seconds', "Durations", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        text = registry.render()
+        assert 'test_seconds_bucket{le="0.1"} 2' in text
+        assert 'test_seconds_bucket{le="1"} 3' in text
+        assert 'test_seconds_bucket{le="+Inf"} 4' in text
+        assert 'test_seconds_sum 3.65' in text
+        assert 'test_seconds_count 4' in text
+        
+    def test_get_or_create(self):
+        """Test declaring a metric twice returns the same one, but not as another type"""
+        registry = Registry()
+        assert registry.counter('test_total', "A") is registry.counter('test_total', "A")
+        with pytest.raises(ValueError):
+            registry.histogram('test_total', "A")
+            
+    def test_textfile(self, tmp_path):
+        """Test metrics are written to a file"""
+        registry = Registry()
+        registry.counter('test_total', "A").inc()
+        path = tmp_path / "aafc.prom"
+        registry.write_textfile(str(path))
+        assert 'test_total 1' in path.read_text()
+        
+    def test_http_server(self):
+        """Test metrics are served at /metrics"""
+        registry = Registry()
+        registry.counter('test_total', "A").inc(2)
+        server = metrics.start_http_server(0, registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                assert 'test_total 2' in response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+
+class TestProcessingMetrics:
+    """Tests for metrics recorded while processing rolls"""
+    
+    def test_process_rolls_data_records(self, sample_roll_df):
+        """Test processing records duration, rows, names and unknown ranks"""
+        before = (app.PROCESS_SECONDS.count, app.ROWS_PROCESSED.value(),
+                  app.NAMES_PROCESSED.value(), app.UNKNOWN_RANK_NAMES.value())
+        output_df, stats = process_rolls_data(sample_roll_df)
+        assert app.PROCESS_SECONDS.count == before[0] + 1
+        assert app.ROWS_PROCESSED.value() == before[1] + 3
+        assert app.NAMES_PROCESSED.value() == before[2] + stats['total_count']
+        assert app.UNKNOWN_RANK_NAMES.value() == before[3] + stats['unknown_count']
@@ -1,5 +1,6 @@
 import pytest
-from app import parse_name
+import pandas as pd
+from app import parse_name, parse_names, build_rank_table, set_rank_aliases, RANK_ALIASES
 
 class TestParseName:
     """Tests for name parsing functionality"""
@@ -76,3 +77,81 @@ class TestParseName:
         assert result['surname'] == "Jones"
         assert result['firstname'] is None
 
+
+class TestRankAliases:
+    """Tests for variant rank spellings resolved through the alias table"""
+    
+    @pytest.mark.parametrize("name_str,expected_rank", [
+        ("Cpl Smith", "CPL"),
+        ("Flg Off Smith", "FLGOFF"),
+        ("CPL. Smith", "CPL"),
+        ("LCDT(AAFC)- Smith", "LCDT"),
+        ("Flt Lt Smith", "FLTLT"),
+        ("FLT-LT Smith", "FLTLT"),
+        ("Sqn Ldr Smith", "SQNLDR"),
+        ("cdt uo Smith", "CUO"),
+        ("Cadet Smith", "CDT"),
+        ("Cdt Smith", "CDT"),
+        ("Sgt Smith", "SGT"),
+        ("cuo Smith", "CUO"),
+    ])
+    def test_variant_spellings(self, name_str, expected_rank):
+        """Test variant spellings resolve to the canonical rank"""
+        result = parse_name(name_str)
+        assert result['rank'] == expected_rank
+        assert result['surname'] == "Smith"
+        assert result['original'] == name_str
+        
+    @pytest.mark.parametrize("name_str", ["wo chen", "Ac Nguyen", "Lac Tran", "Civ Brown"])
+    def test_ambiguous_ranks_need_capitals(self, name_str):
+        """Test rank spellings that are also common names aren't matched unless in capitals"""
+        result = parse_name(name_str)
+        assert result['rank'] == "UNKNOWN"
+        assert result['surname'] == name_str
+        assert parse_name(name_str.upper())['rank'] != "UNKNOWN"
+        
+    def test_longest_rank_wins(self):
+        """Test a rank that prefixes another rank does not shadow it"""
+        assert parse_name("ACW Wilson")['rank'] == "ACW"
+        assert parse_name("AC Wilson")['rank'] == "AC"
+        
+    def test_alias_needs_separator(self):
+        """Test a surname starting with an alias spelling is not taken as a rank"""
+        result = parse_name("W Offord")
+        assert result['rank'] == "UNKNOWN"
+        assert result['surname'] == "W Offord"
+        
+    def test_alias_to_unknown_rank_rejected(self):
+        """Test aliases must map to a recognised rank"""
+        with pytest.raises(ValueError):
+            build_rank_table({"GEN": "GENERAL"})
+            
+    def test_set_rank_aliases(self):
+        """Test the alias table can be replaced at runtime"""
+        original = dict(RANK_ALIASES)
+        try:
+            set_rank_aliases({**original, "SARGE": "SGT"})
+            assert parse_name("Sarge Smith")['rank'] == "SGT"
+        finally:
+            set_rank_aliases(original)
+        assert parse_name("Sarge Smith")['rank'] == "UNKNOWN"
+
+
+class TestParseNames:
+    """Tests for vectorised name parsing"""
+    
+    def test_matches_parse_name(self, sample_names):
+        """Test each row matches the scalar parser"""
+        names = list(sample_names.values()) + [
+            "Cpl Smith", "  SGT   Smith  (John)  ", "SGT John  Paul Smith",
+            "Smith (John", "SGT", "CPL(AAFC) Smith (John)"
+        ]
+        result = parse_names(pd.Series(names))
+        for idx, name in enumerate(names):
+            assert result.iloc[idx].to_dict() == parse_name(name)
+            
+    def test_empty_series(self):
+        """Test an empty Series gives an empty result with the expected columns"""
+        result = parse_names(pd.Series([], dtype=object))
+        assert list(result.columns) == ['rank', 'surname', 'firstname', 'original']
+        assert len(result) == 0
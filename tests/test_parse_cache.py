@@ -0,0 +1,131 @@
+import pytest
+import multiprocessing
+import sqlite3
+import time
+import pandas as pd
+import app
+import parse_cache
+from app import parse_names, parse_unique_names, process_rolls_data, rank_table_signature
+from parse_cache import ParseCache
+
+def _fill_cache(path, names):
+    """Parse names into the cache at path from another process"""
+    cache = ParseCache(path)
+    parse_unique_names(pd.Series(names, dtype=object), cache)
+    cache.close()
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "parse_cache.sqlite")
+
+class TestParseCache:
+    """Tests for the persistent parse cache"""
+    
+    def test_round_trip(self, cache_path):
+        """Test stored fields come back unchanged, including missing firstnames"""
+        cache = ParseCache(cache_path)
+        fields = {'rank': 'SGT', 'surname': 'Smith', 'firstname': None, 'original': 'SGT Smith'}
+        cache.put_many({'SGT Smith': fields}, "sig")
+        assert cache.get_many(['SGT Smith', 'CPL Jones'], "sig") == {'SGT Smith': fields}
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+    def test_persists_across_instances(self, cache_path):
+        """Test entries survive closing and reopening the cache"""
+        cache = ParseCache(cache_path)
+        cache.put_many({'CPL Jones': {'rank': 'CPL', 'surname': 'Jones', 'firstname': None, 'original': 'CPL Jones'}}, "sig")
+        cache.close()
+        assert 'CPL Jones' in ParseCache(cache_path).get_many(['CPL Jones'], "sig")
+        
+    def test_signature_change_invalidates(self, cache_path):
+        """Test entries for other rank tables aren't returned, but are kept for processes still using them"""
+        cache = ParseCache(cache_path)
+        fields = {'rank': 'CPL', 'surname': 'Jones', 'firstname': None, 'original': 'CPL Jones'}
+        cache.put_many({'CPL Jones': fields}, "old")
+        assert cache.get_many(['CPL Jones'], "new") == {}
+        cache.close()
+        reopened = ParseCache(cache_path)
+        assert len(reopened) == 1
+        assert reopened.get_many(['CPL Jones'], "old") == {'CPL Jones': fields}
+        
+    def test_old_signature_evicted_first(self, cache_path):
+        """Test entries for old rank tables are evicted before current ones"""
+        cache = ParseCache(cache_path, max_entries=10)
+        fields = {'rank': 'CDT', 'surname': 'Cadet', 'firstname': None, 'original': 'CDT Cadet'}
+        cache.put_many({f"CDT Cadet{idx}": fields for idx in range(5)}, "old")
+        cache.put_many({f"CDT Cadet{idx}": fields for idx in range(6)}, "new")
+        assert len(cache) == 9
+        assert len(cache.get_many([f"CDT Cadet{idx}" for idx in range(5)], "old")) == 3
+        assert len(cache.get_many([f"CDT Cadet{idx}" for idx in range(6)], "new")) == 6
+        
+    def test_eviction(self, cache_path, monkeypatch):
+        """Test the least recently used entries are evicted past max_entries"""
+        monkeypatch.setattr(parse_cache, 'REFRESH_SECONDS', 0)  # Every lookup refreshes last_used
+        signature = rank_table_signature()
+        cache = ParseCache(cache_path, max_entries=10)
+        names = [f"CDT Cadet{idx}" for idx in range(10)]
+        parse_unique_names(pd.Series(names, dtype=object), cache)
+        cache.get_many(names[5:], signature)  # Touch the newer half
+        parse_unique_names(pd.Series(["CDT Extra"], dtype=object), cache)
+        assert len(cache) == 9
+        assert set(cache.get_many(names[5:], signature)) == set(names[5:])
+        
+    def test_lookup_does_not_write(self, cache_path):
+        """Test lookups leave recently used entries untouched"""
+        cache = ParseCache(cache_path)
+        cache.put_many({'CPL Jones': {'rank': 'CPL', 'surname': 'Jones', 'firstname': None, 'original': 'CPL Jones'}}, "sig")
+        read_last_used = lambda: sqlite3.connect(cache_path).execute("SELECT last_used FROM parsed").fetchone()[0]
+        stored = read_last_used()
+        cache.get_many(['CPL Jones'], "sig")
+        assert read_last_used() == stored
+        
+    def test_locked_database_skips_write(self, cache_path):
+        """Test a write blocked by another connection is skipped quickly"""
+        cache = ParseCache(cache_path)
+        other = sqlite3.connect(cache_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        try:
+            started = time.perf_counter()
+            cache.put_many({'CPL Jones': {'rank': 'CPL', 'surname': 'Jones', 'firstname': None, 'original': 'CPL Jones'}}, "sig")
+            assert time.perf_counter() - started < 1
+        finally:
+            other.execute("ROLLBACK")
+        assert cache.get_many(['CPL Jones'], "sig") == {}
+        
+    def test_parser_version_in_signature(self, monkeypatch):
+        """Test changing the parser version invalidates cached parses"""
+        signature = rank_table_signature()
+        monkeypatch.setattr(app, 'PARSER_VERSION', app.PARSER_VERSION + 1)
+        assert rank_table_signature() != signature
+        
+    def test_shared_between_processes(self, cache_path):
+        """Test names parsed in another process are hits here"""
+        names = ["SGT Smith (John)", "Cpl Jones", "Smith"]
+        process = multiprocessing.get_context("spawn").Process(target=_fill_cache, args=(cache_path, names))
+        process.start()
+        process.join(60)
+        assert process.exitcode == 0
+        signature = rank_table_signature()
+        assert set(ParseCache(cache_path).get_many(names, signature)) == set(names)
+
+class TestCachedParsing:
+    """Tests for parsing through the cache"""
+    
+    def test_matches_parse_names(self, cache_path):
+        """Test cached and uncached parses are identical, before and after caching"""
+        cache = ParseCache(cache_path)
+        names = pd.Series(["SGT Smith (John)", "Cpl Jones", "Smith", "LCDT Boer (Zoe)"], dtype=object)
+        expected = parse_names(names)
+        parse_unique_names(names.iloc[:2], cache)
+        for _ in range(2):
+            assert parse_unique_names(names, cache).to_dict('records') == expected.to_dict('records')
+        assert cache.hits == 2 + 4
+        
+    def test_process_rolls_data_with_cache(self, sample_roll_df, cache_path):
+        """Test processing with a cache gives the same output"""
+        expected_df, expected_stats = process_rolls_data(sample_roll_df.copy())
+        cache = ParseCache(cache_path)
+        for _ in range(2):
+            output_df, stats = process_rolls_data(sample_roll_df.copy(), parse_cache=cache)
+            assert output_df.equals(expected_df)
+            assert stats['section_counts'] == expected_stats['section_counts']
+        assert cache.hits == len(expected_df)
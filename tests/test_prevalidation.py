@@ -0,0 +1,75 @@
+import pytest
+import io
+import random
+import pandas as pd
+import app
+from app import prevalidate_upload, UploadValidationError
+from synthetic_rolls import random_roll_file
+
+class TestPrevalidateUpload:
+    """Tests for the pre-flight upload scanner"""
+    
+    def test_valid_csv(self):
+        """Test a well-formed CSV passes with an exact row count"""
+        data = random_roll_file(random.Random(1), n_rows=25)
+        result = prevalidate_upload(io.BytesIO(data), 'csv')
+        assert result['rows'] == 25
+        assert result['columns'] == 21
+        assert result['header'][8] == "Staff"
+        assert result['estimated_seconds'] >= 0
+        
+    def test_large_csv_row_estimate(self, monkeypatch):
+        """Test rows are estimated from a sample when the CSV is bigger than the sample"""
+        monkeypatch.setattr(app, 'CSV_SAMPLE_BYTES', 2048)
+        data = random_roll_file(random.Random(1), n_rows=400)
+        result = prevalidate_upload(io.BytesIO(data), 'csv')
+        assert 200 < result['rows'] < 800
+        
+    def test_valid_xlsx(self):
+        """Test a workbook passes using only its metadata"""
+        data = random_roll_file(random.Random(1), n_rows=12, file_type='xlsx')
+        result = prevalidate_upload(io.BytesIO(data), 'xlsx')
+        assert result['rows'] == 12
+        assert result['columns'] == 21
+        
+    def test_stream_rewound(self):
+        """Test the file can be read normally after the check"""
+        file = io.BytesIO(random_roll_file(random.Random(1), n_rows=5))
+        prevalidate_upload(file, 'csv')
+        assert len(pd.read_csv(file)) == 5
+        
+    def test_too_few_columns_csv(self):
+        """Test a CSV without the attendance columns is rejected"""
+        with pytest.raises(UploadValidationError, match="at least 21 columns"):
+            prevalidate_upload(io.BytesIO(b"Name,Rank\nSmith,SGT\n"), 'csv')
+            
+    def test_wrong_sheet_xlsx(self):
+        """Test a workbook whose first sheet is too narrow is rejected, naming the sheet"""
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer) as writer:
+            pd.DataFrame({'Notes': ['x']}).to_excel(writer, sheet_name='Notes', index=False)
+        with pytest.raises(UploadValidationError, match="sheet 'Notes'"):
+            prevalidate_upload(io.BytesIO(buffer.getvalue()), 'xlsx')
+            
+    def test_too_large(self, monkeypatch):
+        """Test files over the size limit are rejected before reading"""
+        monkeypatch.setattr(app, 'MAX_UPLOAD_BYTES', 100)
+        with pytest.raises(UploadValidationError, match="limit"):
+            prevalidate_upload(io.BytesIO(b"x" * 101), 'csv')
+            
+    def test_too_many_rows(self, monkeypatch):
+        """Test files over the row limit are rejected"""
+        monkeypatch.setattr(app, 'MAX_UPLOAD_ROWS', 10)
+        data = random_roll_file(random.Random(1), n_rows=11, file_type='xlsx')
+        with pytest.raises(UploadValidationError, match="rows"):
+            prevalidate_upload(io.BytesIO(data), 'xlsx')
+            
+    def test_empty_file(self):
+        """Test an empty upload is rejected"""
+        with pytest.raises(UploadValidationError, match="empty"):
+            prevalidate_upload(io.BytesIO(b""), 'csv')
+            
+    def test_corrupt_xlsx(self):
+        """Test a file that isn't a workbook is rejected"""
+        with pytest.raises(UploadValidationError, match="Excel"):
+            prevalidate_upload(io.BytesIO(b"not a zip file"), 'xlsx')
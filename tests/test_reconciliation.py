@@ -0,0 +1,109 @@
+import pytest
+import pandas as pd
+from app import process_rolls_data, read_nominal_roll, build_nominal_index, reconcile_attendance, parse_name
+
+NOMINAL_CSV = """Rank,Surname,First Name,Flight
+FLTLT,Johnson,Peter,Staff
+Cpl,Smith,Mary,Staff
+SGT,Smith,John,Staff
+CUO,Evans,Kate,Executive and Seniors
+CDT,Vincent,Tom,1 Alpha
+LCDT,Boer,Zoe,2 Alpha
+CDT,Adams,Sam,1 Alpha
+CDT,Brown,Lee,2 Bravo
+CDT,Taylor,Ann,1 Bravo
+CDT,White,Bo,
+"""
+
+@pytest.fixture
+def nominal():
+    return read_nominal_roll(NOMINAL_CSV.encode('utf-8'), 'nominal.csv')
+
+@pytest.fixture
+def reconciliation(sample_roll_df, nominal):
+    output_df, stats = process_rolls_data(sample_roll_df)
+    return reconcile_attendance(output_df, nominal, build_nominal_index(nominal))
+
+class TestReadNominalRoll:
+    """Tests for reading nominal rolls"""
+    
+    def test_columns_and_flights(self, nominal):
+        """Test ranks are normalised and sections grouped into flights"""
+        assert list(nominal.columns) == ['Rank', 'Surname', 'First Name', 'Flight']
+        assert nominal.loc[1, 'Rank'] == 'CPL'
+        assert nominal.loc[4, 'Flight'] == 'Flight 1'
+        assert nominal.loc[9, 'Flight'] == 'Unassigned'
+        
+    def test_single_name_column(self):
+        """Test a nominal roll with names in roll format"""
+        nominal = read_nominal_roll(b"Name\nSGT Smith (John)\nCdt Vincent\n", 'members.csv')
+        assert nominal[['Rank', 'Surname', 'First Name']].values.tolist() == [
+            ['SGT', 'Smith', 'John'], ['CDT', 'Vincent', '']
+        ]
+
+class TestReconcileAttendance:
+    """Tests for reconciling the processed roll against a nominal roll"""
+    
+    def test_present(self, reconciliation):
+        """Test attendees are matched with and without first names"""
+        present = set(reconciliation['present']['Surname'])
+        assert present == {'Johnson', 'Smith', 'Evans', 'Vincent', 'Boer', 'Adams', 'Brown'}
+        assert len(reconciliation['present']) == 8
+        
+    def test_absent(self, reconciliation):
+        """Test members not on the roll are listed as absent"""
+        assert set(reconciliation['absent']['Surname']) == {'Taylor', 'White'}
+        
+    def test_not_on_roll(self, reconciliation):
+        """Test attendees with no matching member are reported"""
+        assert set(reconciliation['not_on_roll']['Full Name']) == {'CWOFF Hartley', 'UNKNOWN Jones', 'CDT Green'}
+        
+    def test_summary_per_flight(self, reconciliation):
+        """Test counts per flight"""
+        summary = reconciliation['summary']
+        assert summary.loc['Staff', 'Present'] == 3
+        assert summary.loc['Flight 1', 'Absent'] == 1
+        assert summary.loc['Not Listed', 'Not On Roll'] == 2
+        assert summary['Present'].sum() + summary['Absent'].sum() == 10
+        
+    def test_ambiguous_member_not_matched(self):
+        """Test a key shared by two members does not match either"""
+        nominal = read_nominal_roll(b"Rank,Surname,First Name\nCDT,Lee,Amy\nCDT,Lee,Ben\n", 'n.csv')
+        output_df = pd.DataFrame({'Rank': ['CDT'], 'Surname': ['Lee'], 'First Name': [''],
+                                  'Full Name': ['CDT Lee'], 'Source Column': ['1 Alpha']})
+        result = reconcile_attendance(output_df, nominal, build_nominal_index(nominal))
+        assert len(result['present']) == 0
+        assert len(result['not_on_roll']) == 1
+        
+    def test_different_first_name_not_matched(self):
+        """Test rank and surname alone don't match an attendee with a different first name"""
+        nominal = read_nominal_roll(b"Rank,Surname,First Name\nCDT,Smith,John\nCDT,Brown,Amy\n", 'n.csv')
+        output_df = pd.DataFrame({'Rank': ['CDT', 'CDT'], 'Surname': ['Smith', 'Smith'],
+                                  'First Name': ['Jane', 'John'], 'Full Name': ['CDT Smith (Jane)', 'CDT Smith (John)'],
+                                  'Source Column': ['1 Alpha', '2 Bravo']})
+        result = reconcile_attendance(output_df, nominal, build_nominal_index(nominal))
+        assert result['present'][['First Name', 'Source Column']].values.tolist() == [['John', '2 Bravo']]
+        assert result['not_on_roll']['Full Name'].tolist() == ['CDT Smith (Jane)']
+        assert result['absent']['Surname'].tolist() == ['Brown']
+        
+    def test_exact_match_claims_member(self):
+        """Test an exact match beats an earlier fallback match, which goes to not on roll"""
+        nominal = read_nominal_roll(b"Rank,Surname,First Name\nCDT,Smith,John\n", 'n.csv')
+        output_df = pd.DataFrame({'Rank': ['CDT', 'CDT'], 'Surname': ['Smith', 'Smith'],
+                                  'First Name': ['', 'John'], 'Full Name': ['CDT Smith', 'CDT Smith (John)'],
+                                  'Source Column': ['1 Alpha', '2 Bravo']})
+        result = reconcile_attendance(output_df, nominal, build_nominal_index(nominal))
+        assert result['present']['Source Column'].tolist() == ['2 Bravo']
+        assert result['not_on_roll']['Full Name'].tolist() == ['CDT Smith']
+        
+    def test_mixed_case_rank_matched(self):
+        """Test a mixed-case rank on the roll matches the same spelling on the nominal roll"""
+        nominal = read_nominal_roll(b"Rank,Surname,First Name,Flight\nCdt,Smith,John,1 Alpha\n", 'n.csv')
+        parsed = parse_name("Cdt Smith (John)")
+        output_df = pd.DataFrame({'Rank': [parsed['rank']], 'Surname': [parsed['surname']],
+                                  'First Name': [parsed['firstname']], 'Full Name': ['CDT Smith (John)'],
+                                  'Source Column': ['1 Alpha']})
+        result = reconcile_attendance(output_df, nominal, build_nominal_index(nominal))
+        assert len(result['present']) == 1
+        assert len(result['absent']) == 0
+        assert len(result['not_on_roll']) == 0
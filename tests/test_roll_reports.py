@@ -0,0 +1,60 @@
+import pytest
+import random
+import zipfile
+from app import process_rolls_data, find_roll_files
+from roll_reports import render_roll_report, generate_reports
+from synthetic_rolls import random_roll_file
+
+class TestRenderRollReport:
+    """Tests for rendering one processed roll as printable HTML"""
+
+    def test_group_order(self, sample_roll_df):
+        """Test Staff, Executives and Flights appear in roll order"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        page = render_roll_report("Parade Night", output_df, stats)
+        staff = page.index("<h2>Staff")
+        execs = page.index("<h2>Executives &amp; Seniors")
+        flight1 = page.index("<h2>Flight 1")
+        flight2 = page.index("<h2>Flight 2")
+        assert staff < execs < flight1 < flight2
+
+    def test_tiles_and_names(self, sample_roll_df):
+        """Test the statistics tiles and every name are on the page"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        page = render_roll_report("Parade Night", output_df, stats)
+        assert f'<div class="value">{stats["total_count"]}</div>' in page
+        assert page.count('<td class="tick">') == len(output_df)
+        for surname in output_df['Surname']:
+            assert surname in page
+
+    def test_escapes_names(self, sample_roll_df):
+        """Test names and titles are HTML-escaped"""
+        sample_roll_df.iloc[0, 0] = "LT <b>Smith</b>"
+        output_df, stats = process_rolls_data(sample_roll_df)
+        page = render_roll_report("A & B", output_df, stats)
+        assert "<b>Smith" not in page
+        assert "A &amp; B" in page
+
+class TestGenerateReports:
+    """Tests for the batch renderer"""
+
+    @pytest.mark.slow
+    def test_archive(self, tmp_path):
+        """Test each roll gets a page, failures are listed, and an index is written"""
+        rng = random.Random(36)
+        (tmp_path / "week1.csv").write_bytes(random_roll_file(rng, n_rows=20))
+        (tmp_path / "week2.xlsx").write_bytes(random_roll_file(rng, n_rows=20, file_type='xlsx'))
+        (tmp_path / "broken.csv").write_bytes(b"a,b\n1,2\n")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        paths = find_roll_files([str(tmp_path)])
+        assert len(paths) == 3
+
+        archive_path = tmp_path / "reports.zip"
+        summaries = generate_reports(paths, str(archive_path), workers=2)
+        with zipfile.ZipFile(archive_path) as archive:
+            assert sorted(archive.namelist()) == ["index.html", "week1.html", "week2.html"]
+            index = archive.read("index.html").decode()
+        assert 'href="week1.html"' in index
+        assert "broken.csv" in index
+        assert [summary['title'] for summary in summaries if 'error' in summary] == ["broken.csv"]
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import app
+from app import (
+    get_shared_resources,
+    clear_shared_resources,
+    get_parse_cache,
+    parse_unique_names,
+    set_rank_aliases,
+    get_rank_priority,
+    parse_name,
+    RANK_ALIASES,
+    STAFF_RANKS
+)
+
+class TestSharedResources:
+    """Tests for the process-wide resource cache"""
+    
+    def test_same_object_every_call(self):
+        """Test repeated calls share one set of resources"""
+        assert get_shared_resources() is get_shared_resources()
+        assert app.RESOURCES is get_shared_resources()
+        
+    def test_shared_across_threads(self):
+        """Test concurrent first use from many threads yields a single instance"""
+        clear_shared_resources()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: get_shared_resources(), range(32)))
+        assert all(result is results[0] for result in results)
+        
+    def test_clear_rebuilds(self):
+        """Test explicit invalidation builds fresh resources with the same content"""
+        before = get_shared_resources()
+        clear_shared_resources()
+        after = get_shared_resources()
+        assert after is not before
+        assert after.rank_lookup == before.rank_lookup
+        assert app.RESOURCES is after
+        
+    def test_alias_change_switches_resources(self):
+        """Test changing the alias table rebinds the lookups used for parsing"""
+        original = dict(RANK_ALIASES)
+        before = get_shared_resources()
+        try:
+            set_rank_aliases({**original, "SARGE": "SGT"})
+            assert get_shared_resources().signature != before.signature
+            assert parse_name("Sarge Smith")['rank'] == "SGT"
+        finally:
+            set_rank_aliases(original)
+        assert get_shared_resources().signature == before.signature
+        
+    def test_parse_cache_follows_rank_tables(self, tmp_path, monkeypatch):
+        """Test cached parses from old rank tables aren't used, and clearing reopens the parse cache"""
+        monkeypatch.setattr(app, 'PARSE_CACHE_PATH', str(tmp_path / "cache.sqlite"))
+        names = pd.Series(["Sarge Smith"], dtype=object)
+        original = dict(RANK_ALIASES)
+        before = get_parse_cache()
+        assert get_parse_cache() is before
+        assert parse_unique_names(names, get_parse_cache())['rank'].tolist() == ["UNKNOWN"]
+        try:
+            set_rank_aliases({**original, "SARGE": "SGT"})
+            assert parse_unique_names(names, get_parse_cache())['rank'].tolist() == ["SGT"]
+        finally:
+            set_rank_aliases(original)
+        clear_shared_resources()
+        assert get_parse_cache() is not before
+        
+    def test_rank_priorities(self):
+        """Test ordinal maps agree with the rank lists"""
+        resources = get_shared_resources()
+        assert resources.staff_priority == {rank: idx for idx, rank in enumerate(STAFF_RANKS)}
+        assert get_rank_priority("NOTARANK", True) == 999
+        assert resources.flight_order['Flight 1'] < resources.flight_order['Flight 2']
@@ -0,0 +1,90 @@
+import pytest
+import pandas as pd
+from app import process_rolls_data, extract_name_table, extract_names_from_row
+
+class TestExtractNameTable:
+    """Tests for vectorised name extraction"""
+    
+    def test_matches_row_extraction(self, sample_roll_df):
+        """Test the name table matches extract_names_from_row over every row"""
+        expected = []
+        for _, row in sample_roll_df.iterrows():
+            expected.extend(extract_names_from_row(row, 0, len(row) - 1))
+        table = extract_name_table(sample_roll_df)
+        assert list(zip(table['Name'], table['Source Column'])) == expected
+        
+    def test_row_positions(self, sample_roll_df):
+        """Test each name records the row it came from"""
+        table = extract_name_table(sample_roll_df)
+        assert table[table['Name'] == "CDT Brown"]['Row'].tolist() == [1]
+        assert table[table['Name'] == "CDT Vincent"]['Row'].tolist() == [0, 2]
+
+class TestStatistics:
+    """Tests for statistics computed by process_rolls_data"""
+    
+    def test_headcounts(self, sample_roll_df):
+        """Test staff, executive and cadet counts"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        assert stats['staff_count'] == 3
+        assert stats['exec_count'] == 2
+        assert stats['cadet_count'] == 8
+        assert stats['total_count'] == len(output_df) == 11
+        
+    def test_section_counts(self, sample_roll_df):
+        """Test section counts include every column a name appeared in"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        assert stats['section_counts']['1 Alpha'] == 2
+        assert stats['section_counts']['2 Alpha'] == 2
+        assert stats['flight1_count'] == 2
+        assert stats['flight2_count'] == 3
+        assert stats['not_listed_count'] == 2
+        
+    def test_section_conflicts(self, sample_roll_df):
+        """Test names ticked in several sections are reported with the section kept"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        conflicts = stats['conflicts']
+        assert conflicts.to_dict('records') == [
+            {'Name': "CDT Adams", 'Kept Section': "1 Alpha", 'Other Sections': "2 Alpha"}
+        ]
+        assert output_df['Surname'].tolist().count("Adams") == 1
+        
+    def test_consistent_totals(self, sample_roll_df):
+        """Test consistent totals count each cadet in one section only"""
+        output_df, stats = process_rolls_data(sample_roll_df, consistent_totals=True)
+        assert stats['section_counts']['1 Alpha'] == 2
+        assert stats['section_counts']['2 Alpha'] == 1
+        assert stats['flight1_count'] == 2
+        assert stats['flight2_count'] == 2
+        assert stats['flight1_count'] + stats['flight2_count'] + stats['exec_count'] \
+            + stats['not_listed_count'] == stats['cadet_count']
+        assert len(stats['conflicts']) == 1
+        
+    def test_unknown_rate(self, sample_roll_df):
+        """Test unknown rank count and rate"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        assert stats['unknown_count'] == 1
+        assert stats['unknown_rate'] == pytest.approx(1 / 11)
+        
+    def test_rank_by_section(self, sample_roll_df):
+        """Test rank x section matrix totals match the output"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        matrix = stats['rank_by_section']
+        assert matrix.to_numpy().sum() == len(output_df)
+        assert matrix.loc['CDT', '1 Alpha'] == 2
+        assert list(matrix.index[:3]) == ['FLTLT', 'SGT', 'CPL']
+        
+    def test_rank_by_flight(self, sample_roll_df):
+        """Test rank x flight matrix groups sub-sections into flights"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        matrix = stats['rank_by_flight']
+        assert list(matrix.columns) == ['Staff', 'Executive and Seniors', 'Flight 1', 'Flight 2', 'Not Listed']
+        assert matrix.loc['CDT', 'Flight 1'] == 2
+        assert matrix.loc['CDT', 'Flight 2'] == 1
+        assert matrix.loc['UNKNOWN', 'Not Listed'] == 1
+        
+    def test_empty_roll(self):
+        """Test an empty roll gives zero counts and the expected output columns"""
+        output_df, stats = process_rolls_data(pd.DataFrame({'Staff': [None]}))
+        assert list(output_df.columns) == ['Rank', 'Surname', 'First Name', 'Full Name', 'Source Column']
+        assert stats['total_count'] == 0
+        assert stats['unknown_rate'] == 0.0
@@ -0,0 +1,99 @@
+import pytest
+import io
+import pandas as pd
+from app import (
+    read_roll_file,
+    load_submission_times,
+    compute_submission_analytics,
+    process_rolls_data
+)
+
+@pytest.fixture
+def submission_df():
+    """Submission columns for the three rows of sample_roll_df, out of order"""
+    return pd.DataFrame({
+        'ID': [1, 2, 3],
+        'Start time': ['2024-02-06 18:20:00', '2024-02-06 18:50:00', '2024-02-06 18:25:00'],
+        'Completion time': ['2024-02-06 18:21:10', '2024-02-06 18:52:00', '2024-02-06 18:27:30'],
+        'Email': 'anonymous', 'Name': '', 'Last modified time': None, 'Date': '', 'Squadron': ''
+    })
+
+@pytest.fixture
+def analytics(submission_df, sample_roll_df):
+    process_rolls_data(sample_roll_df)  # Renames columns as main() does
+    return compute_submission_analytics(submission_df, sample_roll_df)
+
+class TestReadRollFile:
+    """Tests for reading roll files with and without timestamps"""
+    
+    def test_timestamps_only_when_requested(self, submission_df, sample_roll_df):
+        """Test submission columns are split off only with include_timestamps"""
+        data = pd.concat([submission_df, sample_roll_df], axis=1).to_csv(index=False)
+        df, times = read_roll_file(io.StringIO(data), 'csv')
+        assert times is None
+        assert df.shape == (3, 13)
+        df, times = read_roll_file(io.StringIO(data), 'csv', include_timestamps=True)
+        assert df.shape == (3, 13)
+        assert list(times.columns[:3]) == ['ID', 'Start time', 'Completion time']
+
+class TestSubmissionTimes:
+    """Tests for the completion time index"""
+    
+    def test_sorted_datetime_index(self, submission_df):
+        """Test completion times become a sorted DatetimeIndex keeping row positions"""
+        times = load_submission_times(submission_df)
+        assert isinstance(times.index, pd.DatetimeIndex)
+        assert times.index.is_monotonic_increasing
+        assert times['Row'].tolist() == [0, 2, 1]
+        
+    def test_invalid_times_dropped(self, submission_df):
+        """Test rows without a valid completion time are dropped"""
+        submission_df.loc[1, 'Completion time'] = 'not a time'
+        assert load_submission_times(submission_df)['Row'].tolist() == [0, 2]
+        
+    def test_day_first_strings(self, submission_df):
+        """Test d/m/yy times from an Australian CSV export are read day first"""
+        submission_df['Start time'] = ['13/2/24 18:20', '6/2/24 18:50', '12/2/24 18:25']
+        submission_df['Completion time'] = ['13/2/24 18:21', '6/2/24 18:52', '12/2/24 18:27']
+        times = load_submission_times(submission_df)
+        assert times['Row'].tolist() == [1, 2, 0]
+        assert times.index[0] == pd.Timestamp('2024-02-06 18:52')
+        assert times['Start'].iloc[-1] == pd.Timestamp('2024-02-13 18:20')
+
+class TestSubmissionAnalytics:
+    """Tests for arrival histograms, sign-in curves and late counts"""
+    
+    def test_arrivals(self, analytics):
+        """Test submissions and first sign-ins are binned by completion time"""
+        arrivals = analytics['arrivals']
+        assert arrivals['Submissions'].sum() == 3
+        assert arrivals.loc['2024-02-06 18:20', 'Submissions'] == 1
+        assert arrivals.loc['2024-02-06 18:20', 'Names'] == 5
+        assert arrivals.loc['2024-02-06 18:25', 'Names'] == 1
+        assert arrivals.loc['2024-02-06 18:50', 'Names'] == 5
+        assert arrivals['Names'].sum() == 11
+        
+    def test_sign_in_curves(self, analytics):
+        """Test cumulative sign-ins per section follow completion order and end at the section counts"""
+        curves = analytics['sign_in_curves']
+        assert curves['1 Alpha'].tolist() == [1, 1, 2]
+        assert curves['2 Alpha'].tolist() == [1, 2, 2]
+        assert curves['Not Listed'].tolist() == [0, 0, 2]
+        
+    def test_curves_match_section_counts(self, submission_df, sample_roll_df):
+        """Test names ticked in several submissions are counted once per section"""
+        output_df, stats = process_rolls_data(sample_roll_df)
+        curves = compute_submission_analytics(submission_df, sample_roll_df)['sign_in_curves']
+        assert curves.iloc[-1].to_dict() == {col: stats['section_counts'].get(col, 0) for col in curves.columns}
+        
+    def test_late_counts(self, analytics):
+        """Test late submissions and the names in them per section"""
+        late = analytics['late_counts']
+        assert late.loc['1 Alpha', 'Late Submissions'] == 1
+        assert late.loc['1 Alpha', 'Late Names'] == 1
+        assert late['Late Names'].sum() == 1
+        
+    def test_first_and_last(self, analytics):
+        """Test first and last submission times"""
+        assert analytics['first_submission'] == pd.Timestamp('2024-02-06 18:21:10')
+        assert analytics['last_submission'] == pd.Timestamp('2024-02-06 18:52:00')